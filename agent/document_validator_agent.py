@@ -6,6 +6,7 @@ from typing import List, Dict, Any
 import logging
 from urllib.parse import urlparse
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 # --- Setup Logging ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -73,8 +74,7 @@ class DocumentValidatorAgent:
         Main method to be called by orchestrator
         Returns standardized response structure
         """
-        print('Hi',application_data)
-        logging.info(application_data)
+        logging.debug("Validating documents for %s", application_data)
     
         if "documents" not in application_data or not application_data["documents"]:
             return {
@@ -212,12 +212,16 @@ class DocumentValidatorAgent:
         document_results = []
         logging.info("Starting Comprehensive Document Validation Process...")
         
-        for doc in documents_to_process:
+        # Textract calls are independent and I/O bound; issue them all at once so the
+        # step takes about as long as the slowest document rather than the sum of them
+        with ThreadPoolExecutor(max_workers=max(len(documents_to_process), 1)) as executor:
+            all_blocks = list(executor.map(self._analyze, [doc["path"] for doc in documents_to_process]))
+        
+        for doc, blocks in zip(documents_to_process, all_blocks):
             doc_type = doc["type"]
             doc_path = doc["path"]
             logging.info(f"Processing {doc_type} from '{doc_path}'...")
             
-            blocks = self._analyze(doc_path)
             if not blocks:
                 result = {
                     "document_type": doc_type,
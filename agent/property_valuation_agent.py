@@ -1,5 +1,6 @@
 import boto3
 import json
+import gzip
 import os
 import pickle
 import pandas as pd
@@ -9,6 +10,12 @@ from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.metrics import mean_absolute_error, r2_score
 
+def _load_json_body(body: bytes):
+    """Parse an S3 JSON body; application records are stored gzip-compressed"""
+    if body[:2] == b'\x1f\x8b':
+        body = gzip.decompress(body)
+    return json.loads(body)
+
 class PropertyValuationAgent:
     """
     Property Valuation Agent for the home loan workflow
@@ -365,7 +372,7 @@ class PropertyValuationAgent:
                         Bucket=self.bucket_name,
                         Key=obj['Key']
                     )
-                    application_data = json.loads(file_response['Body'].read())
+                    application_data = _load_json_body(file_response['Body'].read())
                     
                     # Check if it has property valuation fields
                     if application_data.get('property_location_city') and application_data.get('property_type'):
@@ -409,7 +416,7 @@ class PropertyValuationAgent:
             print(f"📊 Body Content Preview: {body_content[:200]}...")
             
             # Decode and parse JSON
-            application_data = json.loads(body_content.decode('utf-8'))
+            application_data = _load_json_body(body_content)
             print(f"✅ Successfully parsed JSON with {len(application_data)} keys")
             print(f"📋 Available keys: {list(application_data.keys())}")
             
@@ -432,12 +439,12 @@ class PropertyValuationAgent:
             if 'Contents' in response:
                 for obj in response['Contents']:
                     if obj['Key'].endswith('.json') and ('ml_training_' in obj['Key'] or 
-                                                       json.loads(self.s3.get_object(Bucket=self.bucket_name, Key=obj['Key'])['Body'].read()).get('source') == 'ml_training_data'):
+                                                       _load_json_body(self.s3.get_object(Bucket=self.bucket_name, Key=obj['Key'])['Body'].read()).get('source') == 'ml_training_data'):
                         file_response = self.s3.get_object(
                             Bucket=self.bucket_name,
                             Key=obj['Key']
                         )
-                        training_data.append(json.loads(file_response['Body'].read()))
+                        training_data.append(_load_json_body(file_response['Body'].read()))
             return training_data
         except Exception:
             return []
@@ -9,6 +9,7 @@ import json
 from datetime import datetime
 import re
 import io
+import boto3
 
 # Import existing modules
 from s3_manager import S3ApplicationManager
@@ -30,7 +31,19 @@ app.add_middleware(
 # Initialize managers
 s3_manager = S3ApplicationManager()
 orchestrator = HomeLoanOrchestrator()
-chatbot = HomeLoanChatbot()
+# Chatbots hold per-conversation LangChain memory, so each session gets its own;
+# the Bedrock client and S3 manager underneath are shared
+bedrock_client = boto3.client(service_name="bedrock-runtime", region_name="us-east-1")
+chatbots: Dict[str, HomeLoanChatbot] = {}
+
+def get_session_chatbot(session_id: str) -> HomeLoanChatbot:
+    chatbot = chatbots.get(session_id)
+    if chatbot is None:
+        chatbot = chatbots[session_id] = HomeLoanChatbot(
+            bedrock_client=bedrock_client,
+            s3_manager=s3_manager
+        )
+    return chatbot
 
 # Pydantic models
 class ChatMessage(BaseModel):
@@ -157,7 +170,8 @@ async def chat_endpoint(chat_data: ChatMessage):
         })
         
         # Get response from chatbot
-        response = chatbot.get_response(chat_data.message, session["chat_history"])
+        chatbot = get_session_chatbot(chat_data.session_id)
+        response = await chatbot.aget_response(chat_data.message, session["chat_history"])
         
         # Add assistant response to history
         session["chat_history"].append({
@@ -251,7 +265,7 @@ async def submit_application(request: Request, session_id: str = Form(...)):
             s3_payload = {
                 **form_data,
                 "application_id": application_id,
-                "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "created_at": datetime.now().isoformat(sep=' ', timespec='seconds'),
             }
             s3_manager.save_application(application_id, s3_payload)
         except Exception as e:
@@ -339,6 +353,25 @@ async def upload_document(
     except Exception as e:
         raise HTTPException(500, str(e))
 
+@app.post("/api/application/{application_id}/documents/presign")
+async def presign_document_upload(
+    application_id: str,
+    session_id: str = Form(...),
+    doc_type: str = Form(...),
+    filename: str = Form(...),
+):
+    """Presigned S3 PUT URL so the browser uploads the document directly, without proxying it through this server"""
+    if session_id not in sessions:
+        raise HTTPException(404, "Session not found")
+    if application_id != sessions[session_id].get("current_application_id"):
+        raise HTTPException(400, "Application ID mismatch")
+    try:
+        return s3_manager.generate_presigned_put(application_id, doc_type, filename)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    except Exception as e:
+        raise HTTPException(500, f"Failed to prepare upload: {str(e)}")
+
 @app.get("/api/documents/{token}")
 async def list_documents(token: str):
     try:
@@ -348,6 +381,14 @@ async def list_documents(token: str):
     except Exception as e:
         raise HTTPException(500, f"Failed to list documents: {str(e)}")
 
+@app.get("/api/documents/{token}/{filename}")
+async def get_document_metadata(token: str, filename: str):
+    """Size, type and modification time of one document (a HEAD request, not a listing)"""
+    document = s3_manager.head_document(token, filename)
+    if document is None:
+        raise HTTPException(404, "Document not found")
+    return document
+
 @app.delete("/api/documents/{file_id}")
 async def delete_document(
     file_id: str,  # Format: {token}_{doc_type}.ext (e.g. HL1755006612900_company.jpg)
@@ -363,6 +404,8 @@ async def delete_document(
         print(f"Deleting document {file_id} for token {session_id}")
         s3_manager.delete_document(file_id,session_id)
         return {"status": "success"}
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Delete failed: {str(e)}")
         raise HTTPException(500, f"Failed to delete document: {str(e)}")
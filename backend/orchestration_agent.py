@@ -1,30 +1,60 @@
+import itertools
+import operator
+import threading
 from typing import Dict, Any, List, TypedDict, Annotated
 from langgraph.graph import START, END, StateGraph
+from langchain_core.runnables import RunnableConfig
 from agent.document_validator_agent import DocumentValidatorAgent
 from agent.credit_score_agent import CreditScoreAgent
 from agent.property_valuation_agent import PropertyValuationAgent
 from agent.eligibility_agent import EligibilityAgent, eligibility_node
 from agent.loan_recommender_agent import loan_recommender_node
-from graphviz import Digraph
+
+def _merge_dicts(left: Dict[str, Any], right: Dict[str, Any]) -> Dict[str, Any]:
+    """Reducer for agent result channels: later writes update earlier ones"""
+    return {**left, **right}
 
 class WorkflowState(TypedDict):
     applicant_data: Dict[str, Any]
     document_paths: Dict[str, str]
-    credit_score_result: Dict[str, Any]
-    document_validation_result: Annotated[Dict[str, Any], "doc_validator"]
-    property_valuation_result: Annotated[Dict[str, Any], "prop_validator"]
-    eligibility_result: Annotated[Dict[str, Any], "eligibility_checker"]
-    approval_recommendation: Annotated[Dict[str, Any], "recommender"]
-    workflow_status: Annotated[str, "finalizer"]
-    doc_errors: Annotated[List[str], "doc_validator"]
-    prop_errors: Annotated[List[str], "prop_validator"]
-    elig_errors: Annotated[List[str], "eligibility_checker"]
-    rec_errors: Annotated[List[str], "recommender"]
+    credit_score_result: Annotated[Dict[str, Any], _merge_dicts]
+    document_validation_result: Annotated[Dict[str, Any], _merge_dicts]
+    property_valuation_result: Annotated[Dict[str, Any], _merge_dicts]
+    eligibility_result: Annotated[Dict[str, Any], _merge_dicts]
+    approval_recommendation: Annotated[Dict[str, Any], _merge_dicts]
+    workflow_status: str
+    doc_errors: Annotated[List[str], operator.add]
+    credit_errors: Annotated[List[str], operator.add]
+    prop_errors: Annotated[List[str], operator.add]
+    elig_errors: Annotated[List[str], operator.add]
+    rec_errors: Annotated[List[str], operator.add]
+    errors: List[str]
+
+# The workflow topology is static, so it is compiled once per process and
+# shared by every orchestrator; each run passes its orchestrator via config.
+_COMPILED_APP = None
+_COMPILED_APP_LOCK = threading.Lock()
+
+def _get_app():
+    """Return the process-wide compiled workflow, compiling it on first use"""
+    global _COMPILED_APP
+    if _COMPILED_APP is None:
+        with _COMPILED_APP_LOCK:
+            if _COMPILED_APP is None:
+                _COMPILED_APP = HomeLoanOrchestrator._build_workflow().compile()
+    return _COMPILED_APP
+
+def _orchestrator_node(method_name: str):
+    """Wrap an orchestrator method as a node that resolves the instance from config"""
+    def node(state: WorkflowState, config: RunnableConfig) -> Dict[str, Any]:
+        orchestrator = config["configurable"]["orchestrator"]
+        return getattr(orchestrator, method_name)(state)
+    node.__name__ = method_name
+    return node
 
 class HomeLoanOrchestrator:
     def __init__(self):
-        self.graph = self._build_workflow()
-        self.app = self.graph.compile()
+        self.app = _get_app()
         self.document_validator = DocumentValidatorAgent()
         self.credit_score_agent = CreditScoreAgent()
         self.property_valuation_agent = PropertyValuationAgent()
@@ -58,15 +88,16 @@ class HomeLoanOrchestrator:
             "finalize_status": False
         }
 
-    def _build_workflow(self) -> StateGraph:
+    @classmethod
+    def _build_workflow(cls) -> StateGraph:
         workflow = StateGraph(WorkflowState)
 
-        workflow.add_node("document_validator", self._run_document_validator)
-        workflow.add_node("credit_score_agent", self._run_credit_score_agent)
-        workflow.add_node("property_valuation_agent", self._run_property_valuation_agent)
-        workflow.add_node("eligibility_agent", self._run_eligibility_agent)
-        workflow.add_node("approval_recommender", self._run_approval_recommender)
-        workflow.add_node("finalize_status", self._finalize_workflow_status)
+        workflow.add_node("document_validator", _orchestrator_node("_run_document_validator"))
+        workflow.add_node("credit_score_agent", _orchestrator_node("_run_credit_score_agent"))
+        workflow.add_node("property_valuation_agent", _orchestrator_node("_run_property_valuation_agent"))
+        workflow.add_node("eligibility_agent", _orchestrator_node("_run_eligibility_agent"))
+        workflow.add_node("approval_recommender", _orchestrator_node("_run_approval_recommender"))
+        workflow.add_node("finalize_status", _orchestrator_node("_finalize_workflow_status"))
 
         workflow.add_edge(START, "document_validator")
         workflow.add_edge(START, "credit_score_agent")
@@ -74,19 +105,19 @@ class HomeLoanOrchestrator:
         
         workflow.add_conditional_edges(
             "document_validator",
-            self._should_proceed_to_eligibility,
+            cls._should_proceed_to_eligibility,
             {"continue": "eligibility_agent", "wait": "document_validator"}
         )
 
         workflow.add_conditional_edges(
             "credit_score_agent",
-            self._should_proceed_to_eligibility,
+            cls._should_proceed_to_eligibility,
             {"continue": "eligibility_agent", "wait": "credit_score_agent"}
         )
         
         workflow.add_conditional_edges(
             "property_valuation_agent",
-            self._should_proceed_to_eligibility,
+            cls._should_proceed_to_eligibility,
             {"continue": "eligibility_agent", "wait": "property_valuation_agent"}
         )
         
@@ -229,36 +260,36 @@ class HomeLoanOrchestrator:
 
     def _finalize_workflow_status(self, state: WorkflowState) -> Dict[str, Any]:
         """Consolidate final status with single writer"""
-        all_errors = (
-            state.get("doc_errors", []) +
-            state.get("credit_errors", []) +
-            state.get("prop_errors", []) +
-            state.get("elig_errors", []) +
+        all_errors = list(itertools.chain(
+            state.get("doc_errors", []),
+            state.get("credit_errors", []),
+            state.get("prop_errors", []),
+            state.get("elig_errors", []),
             state.get("rec_errors", [])
-        )
+        ))
         
         status = "success"
-        if any([
-            state["document_validation_result"].get("status") == "error",
-            state["credit_score_result"].get("status") == "error",
-            state["property_valuation_result"].get("status") == "error",
-            state["eligibility_result"].get("status") == "error",
-            state["approval_recommendation"].get("status") == "error"
-        ]):
+        if any(
+            state[key].get("status") == "error"
+            for key in (
+                "document_validation_result",
+                "credit_score_result",
+                "property_valuation_result",
+                "eligibility_result",
+                "approval_recommendation"
+            )
+        ):
             status = "failed"
         elif all_errors:
             status = "partial_success"
             
         return {
             "workflow_status": status,
-            "doc_errors": [],
-            "prop_errors": [],
-            "elig_errors": [],
-            "rec_errors": [],
             "errors": all_errors  # Only finalizer writes to this
         }
 
-    def _should_proceed_to_eligibility(self, state: WorkflowState) -> str:
+    @staticmethod
+    def _should_proceed_to_eligibility(state: WorkflowState) -> str:
         """Determine if workflow can proceed to eligibility check"""
         # Check if all prerequisite nodes are complete
         if (state.get("document_validation_result") and 
@@ -267,9 +298,9 @@ class HomeLoanOrchestrator:
             return "continue"
         return "wait"
     
-    def run_workflow(self, applicant_data: Dict[str, Any], document_paths: Dict[str, str]) -> Dict[str, Any]:
-        """Execute the complete workflow with separated inputs"""
-        initial_state = WorkflowState(
+    @staticmethod
+    def _initial_state(applicant_data: Dict[str, Any], document_paths: Dict[str, str]) -> WorkflowState:
+        return WorkflowState(
             applicant_data=applicant_data,
             document_paths=document_paths,
             document_validation_result={},
@@ -279,28 +310,53 @@ class HomeLoanOrchestrator:
             approval_recommendation={},
             workflow_status="started",
             doc_errors=[],
+            credit_errors=[],
             prop_errors=[],
             elig_errors=[],
-            rec_errors=[]
+            rec_errors=[],
+            errors=[]
         )
-        
+
+    @staticmethod
+    def _format_result(final_state: WorkflowState) -> Dict[str, Any]:
+        return {
+            "status": final_state["workflow_status"],
+            "results": {
+                "document_validation": final_state["document_validation_result"],
+                "credit_score": final_state["credit_score_result"],
+                "property_valuation": final_state["property_valuation_result"],
+                "eligibility": final_state["eligibility_result"],
+                "approval_recommendation": final_state["approval_recommendation"]
+            },
+            "errors": final_state.get("errors", [])
+        }
+
+    @staticmethod
+    def _format_error(e: Exception) -> Dict[str, Any]:
+        return {
+            "status": "error",
+            "message": f"Workflow execution failed: {str(e)}",
+            "errors": [str(e)]
+        }
+
+    def run_workflow(self, applicant_data: Dict[str, Any], document_paths: Dict[str, str]) -> Dict[str, Any]:
+        """Execute the complete workflow with separated inputs"""
         try:
-            final_state = self.app.invoke(initial_state)
-            
-            return {
-                "status": final_state["workflow_status"],
-                "results": {
-                    "document_validation": final_state["document_validation_result"],
-                    "credit_score": final_state["credit_score_result"],
-                    "property_valuation": final_state["property_valuation_result"],
-                    "eligibility": final_state["eligibility_result"],
-                    "approval_recommendation": final_state["approval_recommendation"]
-                },
-                "errors": final_state.get("errors", [])
-            }
+            final_state = self.app.invoke(
+                self._initial_state(applicant_data, document_paths),
+                config={"configurable": {"orchestrator": self}}
+            )
+            return self._format_result(final_state)
         except Exception as e:
-            return {
-                "status": "error",
-                "message": f"Workflow execution failed: {str(e)}",
-                "errors": [str(e)]
-            }
\ No newline at end of file
+            return self._format_error(e)
+
+    async def arun_workflow(self, applicant_data: Dict[str, Any], document_paths: Dict[str, str]) -> Dict[str, Any]:
+        """Async variant of run_workflow; the three independent agents run concurrently"""
+        try:
+            final_state = await self.app.ainvoke(
+                self._initial_state(applicant_data, document_paths),
+                config={"configurable": {"orchestrator": self}}
+            )
+            return self._format_result(final_state)
+        except Exception as e:
+            return self._format_error(e)
@@ -1,60 +1,96 @@
-import streamlit as st
 import os
+import io
+import copy
+import gzip
 import time
 import boto3
-from datetime import datetime
 import re
 from typing import Dict, Any, List, Optional
-import json
 import botocore
+from botocore.config import Config
+from boto3.s3.transfer import TransferConfig
+import orjson
+import logging
+import threading
+from functools import lru_cache
+from cachetools import TTLCache
 import uuid
 
-# Updated LangChain imports
-from langchain_aws import ChatBedrock
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from langchain.memory import ConversationBufferWindowMemory
-from langchain.chains import ConversationChain
-from langchain.prompts import PromptTemplate
-LANGCHAIN_AVAILABLE = True
+logger = logging.getLogger(__name__)
+
 # S3 Configuration
 S3_BUCKET_NAME = "sarma-1"
 S3_PREFIX = "customers_data/"
 
+# Short-lived cache of application JSON keyed by clean token. Streamlit reads
+# the same application several times per render; writes invalidate the entry.
+_APPLICATION_CACHE = TTLCache(maxsize=256, ttl=30)
+_APPLICATION_CACHE_LOCK = threading.Lock()
+
+def _invalidate_application(clean_token_val: str) -> None:
+    with _APPLICATION_CACHE_LOCK:
+        _APPLICATION_CACHE.pop(clean_token_val, None)
+
+# Application token format: HL followed by 13 digits
+TOKEN_RE = re.compile(r'^HL\d{13}$')
+TOKEN_SEARCH_RE = re.compile(r'HL\d{13}')
+
+def _serialize_application(application_data: dict) -> bytes:
+    """Compact JSON, gzipped at level 1 (fast); about 5x smaller for application records"""
+    return gzip.compress(
+        orjson.dumps(application_data, default=str, option=orjson.OPT_SERIALIZE_NUMPY),
+        compresslevel=1
+    )
+
+def _deserialize_application(body: bytes) -> dict:
+    # Objects written before compression was introduced are plain JSON
+    if body[:2] == b'\x1f\x8b':
+        body = gzip.decompress(body)
+    return orjson.loads(body)
+
+def application_prefix(clean_token_val: str) -> str:
+    """Key prefix holding every object for one application.
+    The layout is customers_data/<token>/, which the property valuation agent also reads."""
+    return f"{S3_PREFIX}{clean_token_val}/"
+
+@lru_cache(maxsize=1024)
 def clean_token(token: str) -> str:
-    """Clean and standardize token format"""
+    """Clean and standardize token format (memoized; pure, so safe to cache)"""
+    if isinstance(token, str):
+        return token.strip().upper()
     if not token:
         return ""
     return str(token).strip().upper()
 
-# Initialize session state
-if 'chat_history' not in st.session_state:
-    st.session_state.chat_history = [{
-        "role": "assistant",
-        "content": "Hello! I'm your Home Loan Assistant. I can help you with information about home loans, eligibility, interest rates, and more. How can I assist you today?"
-    }]
-if 'applications' not in st.session_state:
-    st.session_state.applications = {}
-if 'current_view' not in st.session_state:
-    st.session_state.current_view = "chat"
-if 'show_form_button' not in st.session_state:
-    st.session_state.show_form_button = False
-if 'show_update_button' not in st.session_state:
-    st.session_state.show_update_button = False
-if 'show_cancel_button' not in st.session_state:
-    st.session_state.show_cancel_button = False
-if 'show_cancel_confirmation' not in st.session_state:
-    st.session_state.show_cancel_confirmation = False
+def is_valid_token(token: str) -> bool:
+    """True for a cleaned token in the HL + 13 digits format"""
+    return bool(TOKEN_RE.match(token))
 
 
 class S3ApplicationManager:
     def __init__(self, region_name="us-east-1"):
-        self.s3 = boto3.client('s3', region_name=region_name)
+        # Large enough pool that parallel document operations don't queue on connections
+        self.s3 = boto3.client(
+            's3',
+            region_name=region_name,
+            config=Config(
+                max_pool_connections=64,
+                tcp_keepalive=True,
+                retries={'max_attempts': 3, 'mode': 'adaptive'}
+            )
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=8 * 1024 * 1024,
+            multipart_chunksize=8 * 1024 * 1024,
+            max_concurrency=10,
+            use_threads=True
+        )
     
     def ensure_folder_exists(self, token: str) -> bool:
         """Ensure the token folder exists in S3"""
         try:
             clean_token_val = clean_token(token)
-            folder_key = f"{S3_PREFIX}{clean_token_val}/"
+            folder_key = application_prefix(clean_token_val)
             self.s3.put_object(
                 Bucket=S3_BUCKET_NAME,
                 Key=folder_key,
@@ -63,7 +99,7 @@ class S3ApplicationManager:
             )
             return True
         except Exception as e:
-            st.error(f"Failed to create folder in S3: {str(e)}")
+            logger.exception(f"Failed to create folder in S3: {str(e)}")
             return False
     
     def save_application(self, token: str, application_data: dict):
@@ -75,34 +111,48 @@ class S3ApplicationManager:
                 return False
                 
             # Save the application data with the new structure
-            key = f"{S3_PREFIX}{clean_token_val}/{clean_token_val}_basic_info.json"
+            key = f"{application_prefix(clean_token_val)}{clean_token_val}_basic_info.json"
             self.s3.put_object(
                 Bucket=S3_BUCKET_NAME,
                 Key=key,
-                Body=json.dumps(application_data, default=str, indent=2),
-                ContentType='application/json'
+                Body=_serialize_application(application_data),
+                ContentType='application/json',
+                ContentEncoding='gzip'
             )
+            _invalidate_application(clean_token_val)
             return True
         except Exception as e:
-            st.error(f"Failed to save application to S3: {str(e)}")
+            logger.exception(f"Failed to save application to S3: {str(e)}")
             return False
     
     def get_application(self, token: str) -> Optional[dict]:
-        try:
-            clean_token_val = clean_token(token)
-            if not clean_token_val:
+        clean_token_val = clean_token(token)
+        if not clean_token_val:
+            return None
+        
+        with _APPLICATION_CACHE_LOCK:
+            cached = _APPLICATION_CACHE.get(clean_token_val)
+        if cached is None:
+            cached = self._get_application_uncached(clean_token_val)
+            if cached is None:
                 return None
-                
-            key = f"{S3_PREFIX}{clean_token_val}/{clean_token_val}_basic_info.json"
+            with _APPLICATION_CACHE_LOCK:
+                _APPLICATION_CACHE[clean_token_val] = cached
+        # Callers keep and edit the record (session state, form data); never hand out the cached object
+        return copy.deepcopy(cached)
+    
+    def _get_application_uncached(self, clean_token_val: str) -> Optional[dict]:
+        try:
+            key = f"{application_prefix(clean_token_val)}{clean_token_val}_basic_info.json"
             response = self.s3.get_object(Bucket=S3_BUCKET_NAME, Key=key)
-            return json.loads(response['Body'].read().decode('utf-8'))
+            return _deserialize_application(response['Body'].read())
         except botocore.exceptions.ClientError as e:
             if e.response['Error']['Code'] == 'NoSuchKey':
                 return None
-            st.error(f"Error retrieving application: {str(e)}")
+            logger.exception(f"Error retrieving application: {str(e)}")
             return None
         except Exception as e:
-            st.error(f"Unexpected error: {str(e)}")
+            logger.exception(f"Unexpected error: {str(e)}")
             return None
     
     def update_application(self, token: str, updated_data: dict):
@@ -113,16 +163,18 @@ class S3ApplicationManager:
                 return False
             
             existing_data.update(updated_data)
-            existing_data['last_updated'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            # Sortable epoch seconds; format for display at read time
+            existing_data.pop('last_updated', None)
+            existing_data['last_updated_epoch'] = int(time.time())
             return self.save_application(clean_token_val, existing_data)
         except Exception as e:
-            st.error(f"Failed to update application in S3: {str(e)}")
+            logger.exception(f"Failed to update application in S3: {str(e)}")
             return False
     
     def delete_application(self, token: str) -> bool:
         try:
             clean_token_val = clean_token(token)
-            prefix = f"{S3_PREFIX}{clean_token_val}/"
+            prefix = application_prefix(clean_token_val)
             
             # List and delete all objects in the folder
             objects_to_delete = []
@@ -138,9 +190,10 @@ class S3ApplicationManager:
                     Delete={'Objects': objects_to_delete}
                 )
             
+            _invalidate_application(clean_token_val)
             return True
         except Exception as e:
-            st.error(f"Failed to delete application from S3: {str(e)}")
+            logger.exception(f"Failed to delete application from S3: {str(e)}")
             return False
     
     def list_applications(self) -> list:
@@ -153,7 +206,7 @@ class S3ApplicationManager:
                    for obj in response.get('Contents', []) 
                    if obj['Key'].endswith('.json')]
         except Exception as e:
-            st.error(f"Failed to list applications from S3: {str(e)}")
+            logger.exception(f"Failed to list applications from S3: {str(e)}")
             return []
     def upload_document(self, token: str, file_obj, doc_type: str) -> str:
         """
@@ -165,7 +218,7 @@ class S3ApplicationManager:
             clean_token_val = clean_token(token)
             
             # 1. Ensure documents folder exists
-            documents_prefix = f"{S3_PREFIX}{clean_token_val}/documents/"
+            documents_prefix = f"{application_prefix(clean_token_val)}documents/"
             self.s3.put_object(
                 Bucket=S3_BUCKET_NAME,
                 Key=documents_prefix,
@@ -192,33 +245,62 @@ class S3ApplicationManager:
             file_key = f"{documents_prefix}{clean_token_val}_{doc_type}.{file_ext}"
             
             if hasattr(file_obj, 'read'):
-                file_bytes = file_obj.read()
+                pass
             elif hasattr(file_obj, 'getvalue'):
-                file_bytes = file_obj.getvalue()
+                file_obj = io.BytesIO(file_obj.getvalue())
             else:
                 raise ValueError("Invalid file object - no readable content")
-                
-            if not file_bytes:
+            
+            # Check for empty content without reading the file into memory
+            file_obj.seek(0, os.SEEK_END)
+            if file_obj.tell() == 0:
                 raise ValueError("Empty file content")
-                
-            self.s3.put_object(
-                Bucket=S3_BUCKET_NAME,
-                Key=file_key,
-                Body=file_bytes,
-                ContentType=self._get_content_type(file_ext)
+            file_obj.seek(0)
+            
+            # Stream the file to S3 in multipart chunks
+            self.s3.upload_fileobj(
+                file_obj,
+                S3_BUCKET_NAME,
+                file_key,
+                ExtraArgs={'ContentType': self._get_content_type(file_ext)},
+                Config=self.transfer_config
             )
             
             # Return full S3 path
             return f"s3://{S3_BUCKET_NAME}/{file_key}"
             
         except Exception as e:
-            st.error(f"Failed to upload document: {str(e)}")
+            logger.exception(f"Failed to upload document: {str(e)}")
             raise  # Re-raise to handle in calling code
+
+    def generate_presigned_put(self, token: str, doc_type: str, filename: str, expires_in: int = 900) -> dict:
+        """
+        Presigned PUT for uploading a document straight from the browser to S3
+        Key format matches upload_document: {prefix}{token}/documents/{token}_{doc_type}.ext
+        """
+        clean_token_val = clean_token(token)
+        file_ext = os.path.splitext(filename)[1][1:].lower() if '.' in filename else 'jpg'
+        if file_ext not in ['pdf', 'jpg', 'jpeg', 'png']:
+            raise ValueError(f"Unsupported file type: {file_ext}")
+        
+        file_key = f"{application_prefix(clean_token_val)}documents/{clean_token_val}_{doc_type}.{file_ext}"
+        content_type = self._get_content_type(file_ext)
+        upload_url = self.s3.generate_presigned_url(
+            'put_object',
+            Params={'Bucket': S3_BUCKET_NAME, 'Key': file_key, 'ContentType': content_type},
+            ExpiresIn=expires_in
+        )
+        return {
+            "upload_url": upload_url,
+            "content_type": content_type,
+            "s3_path": f"s3://{S3_BUCKET_NAME}/{file_key}"
+        }
+
     def list_documents(self, token: str) -> list:
         """List all documents with full S3 paths"""
         try:
             clean_token_val = clean_token(token)
-            prefix = f"{S3_PREFIX}{clean_token_val}/documents/"
+            prefix = f"{application_prefix(clean_token_val)}documents/"
             
             response = self.s3.list_objects_v2(
                 Bucket=S3_BUCKET_NAME,
@@ -232,7 +314,7 @@ class S3ApplicationManager:
                 'last_modified': obj['LastModified']
             } for obj in response.get('Contents', []) if obj['Key'] != prefix]
         except Exception as e:
-            st.error(f"Failed to list documents: {str(e)}")
+            logger.exception(f"Failed to list documents: {str(e)}")
             return []
     
     def _get_content_type(self, file_ext: str) -> str:
@@ -249,7 +331,7 @@ class S3ApplicationManager:
         """List all documents for a given token and clean filenames by removing token prefix"""
         try:
             clean_token_val = clean_token(token)
-            prefix = f"customers_data/{clean_token_val}/documents/"
+            prefix = f"{application_prefix(clean_token_val)}documents/"
             response = self.s3.list_objects_v2(
                 Bucket="sarma-1",
                 Prefix=prefix
@@ -280,8 +362,34 @@ class S3ApplicationManager:
                 
             return documents
         except Exception as e:
-            st.error(f"Failed to list documents: {str(e)}")
+            logger.exception(f"Failed to list documents: {str(e)}")
             return []
+
+    def head_document(self, token: str, filename: str) -> Optional[dict]:
+        """
+        Fetch metadata for a single document with head_object instead of
+        listing the whole documents prefix
+        """
+        try:
+            clean_token_val = clean_token(token)
+            file_key = f"{application_prefix(clean_token_val)}documents/{filename}"
+            response = self.s3.head_object(Bucket=S3_BUCKET_NAME, Key=file_key)
+            return {
+                'name': filename,
+                's3_path': f"s3://{S3_BUCKET_NAME}/{file_key}",
+                'size': response['ContentLength'],
+                'last_modified': response['LastModified'],
+                'content_type': response.get('ContentType')
+            }
+        except botocore.exceptions.ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            logger.exception(f"Failed to fetch document metadata {filename}: {str(e)}")
+            return None
+        except Exception as e:
+            logger.exception(f"Failed to fetch document metadata {filename}: {str(e)}")
+            return None
+
     def delete_document(self, token: str, filename: str) -> None:
         """
         Delete a document from S3
@@ -291,7 +399,7 @@ class S3ApplicationManager:
             actual_token=filename 
             actual_file_name=token
             clean_token_val = clean_token(actual_token)
-            file_key = f"{S3_PREFIX}{clean_token_val}/documents/{actual_file_name}"
+            file_key = f"{application_prefix(clean_token_val)}documents/{actual_file_name}"
             print("file_key",file_key)
             self.s3.delete_object(
                 Bucket=S3_BUCKET_NAME,
@@ -1,12 +1,20 @@
 
 
 import os
-from rag_system import HomeLoanRAGSystem
+import asyncio
+from rag_system import get_rag_system
 
 # ===== EDIT THIS PATH TO YOUR PDF FILE =====
 PDF_PATH = r"Home Loan Requirements Details.pdf"  # Change this to your PDF file name/path
+INGEST_BATCH_SIZE = 64
 # ============================================
 
+async def run_test_queries(rag_system, queries):
+    """Run the post-ingest test searches concurrently"""
+    return await asyncio.gather(
+        *[rag_system.asearch_similar_documents(query, top_k=2) for query in queries]
+    )
+
 def main():
     print("=== Home Loan Document Ingestion ===")
     
@@ -20,7 +28,7 @@ def main():
     print(f"🔧 Initializing RAG system...")
     
     # Initialize RAG system with Qdrant Cloud
-    rag_system = HomeLoanRAGSystem()
+    rag_system = get_rag_system()
     
     if not rag_system.is_initialized():
         print("❌ Error: Failed to initialize RAG system.")
@@ -33,7 +41,7 @@ def main():
     print(f"📚 Ingesting PDF: {PDF_PATH}")
     print("This may take a few minutes...")
     
-    success = rag_system.ingest_pdf(PDF_PATH)
+    success = rag_system.ingest_pdf(PDF_PATH, batch_size=INGEST_BATCH_SIZE)
     
     if success:
         print("✅ PDF ingested successfully!")
@@ -50,9 +58,9 @@ def main():
             "What are the interest rates?"
         ]
         
-        for i, query in enumerate(test_queries, 3):
+        all_results = asyncio.run(run_test_queries(rag_system, test_queries))
+        for i, (query, results) in enumerate(zip(test_queries, all_results), 3):
             print(f"\n{i}. Test query: {query}")
-            results = rag_system.search_similar_documents(query, top_k=2)
             if results:
                 print(f"   ✅ Found {len(results)} relevant documents")
                 for j, result in enumerate(results):
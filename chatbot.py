@@ -5,31 +5,65 @@ from datetime import datetime
 import re
 from typing import Dict, Any, List
 import json
-from s3_manager import S3ApplicationManager
-from rag_system import HomeLoanRAGSystem
+import threading
+import asyncio
+from cachetools import TTLCache
+from s3_manager import S3ApplicationManager, clean_token, TOKEN_RE, TOKEN_SEARCH_RE
+from rag_system import get_rag_system, RAG_PAYLOAD_FIELDS
 
-from langchain_aws import ChatBedrock
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from langchain.memory import ConversationBufferWindowMemory
-from langchain.chains import ConversationChain
-from langchain.prompts import PromptTemplate
-LANGCHAIN_AVAILABLE = True
+try:
+    from langchain_aws import ChatBedrock
+    from langchain.memory import ConversationBufferWindowMemory
+    from langchain.chains import ConversationChain
+    from langchain.prompts import PromptTemplate
+    LANGCHAIN_AVAILABLE = True
+except ImportError:
+    LANGCHAIN_AVAILABLE = False
 
+# Chat turns replayed into the LLM memory on every call
+HISTORY_WINDOW = 10
+
+# Marker-only LLM replies (routing decisions such as <<BASIC_QUERY>>) keyed on the
+# normalized prompt plus the history window the LLM saw, so a reply is only reused for
+# an identical conversation (e.g. the opening sample questions), never another user's.
+_LLM_REPLY_CACHE = TTLCache(maxsize=512, ttl=3600)
+_LLM_REPLY_CACHE_LOCK = threading.Lock()
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+
+def _normalize_prompt(message: str) -> str:
+    return ' '.join(_PUNCTUATION_RE.sub(' ', message.lower()).split())
+
+def _reply_cache_key(message: str, chat_history: list) -> tuple:
+    history = tuple(
+        (msg.get("role"), _normalize_prompt(msg.get("content", "")))
+        for msg in (chat_history or [])[-HISTORY_WINDOW:]
+    )
+    return _normalize_prompt(message), history
+
+# Shortest message worth a speculative knowledge-base search
+MIN_RETRIEVAL_WORDS = 3
+
+def _may_need_retrieval(message: str) -> bool:
+    return len(message.split()) >= MIN_RETRIEVAL_WORDS and not TOKEN_SEARCH_RE.search(message.upper())
+
+def _current_date() -> str:
+    return datetime.now().strftime("%Y-%m-%d")
 
-def clean_token(token: str) -> str:
-    """Clean and standardize token format"""
-    if not token:
-        return ""
-    return str(token).strip().upper()
 
 class HomeLoanChatbot:
-    def __init__(self, region_name="us-east-1"):
+    def __init__(self, region_name="us-east-1", latency_optimized: bool = False,
+                 bedrock_client=None, s3_manager: S3ApplicationManager = None):
+        """One instance per conversation (the memory holds its turns); pass shared
+        bedrock_client / s3_manager to avoid building new AWS clients per instance"""
         self.region_name = region_name
+        # Bedrock latency-optimized inference; only some models/regions support it
+        self.latency_optimized = latency_optimized
+        self.bedrock_client = bedrock_client
         self.llm = None
         self.memory = None
         self.conversation = None
-        self.s3_manager = S3ApplicationManager(region_name)
-        self.rag_system = HomeLoanRAGSystem()
+        self.s3_manager = s3_manager or S3ApplicationManager(region_name)
+        self.rag_system = get_rag_system()
         # Initialize RAG system with better error handling
         '''try:
             self.rag_system = HomeLoanRAGSystem()
@@ -96,7 +130,7 @@ You are a home loan bot that ONLY responds using the predefined tags below. Foll
    - Respond ONLY with the exact tag or phrase
    - Never break format or improvise
 
-Current date: {current_date}""".format(current_date=datetime.now().strftime("%Y-%m-%d"))
+Current date: {current_date}"""
 
         
         if LANGCHAIN_AVAILABLE:
@@ -112,25 +146,33 @@ Current date: {current_date}""".format(current_date=datetime.now().strftime("%Y-
             return
             
         try:
-            bedrock_client = boto3.client(
+            bedrock_client = self.bedrock_client or boto3.client(
                 service_name="bedrock-runtime",
                 region_name=self.region_name
             )
             
+            model_kwargs = {
+                "max_tokens": 8000,
+                "temperature": 0.7,
+                "top_p": 0.9
+            }
+            if self.latency_optimized:
+                model_kwargs["performance_config"] = {"latency": "optimized"}
+            
             self.llm = ChatBedrock(
                 client=bedrock_client,
                 model_id="anthropic.claude-3-sonnet-20240229-v1:0",
-                model_kwargs={
-                    "max_tokens": 8000,
-                    "temperature": 0.7,
-                    "top_p": 0.9
-                }
+                model_kwargs=model_kwargs,
+                # performanceConfig is only accepted by the Converse API
+                beta_use_converse_api=self.latency_optimized
             )
             
             if self.llm and self.memory:
                 prompt_template = PromptTemplate(
                     input_variables=["history", "input"],
-                    template=f"{self.system_prompt}\n\nConversation History:\n{{history}}\n\nHuman: {{input}}\nAssistant:"
+                    template=f"{self.system_prompt}\n\nConversation History:\n{{history}}\n\nHuman: {{input}}\nAssistant:",
+                    # Filled in on every call, so the date never goes stale
+                    partial_variables={"current_date": _current_date}
                 )
                 
                 self.conversation = ConversationChain(
@@ -156,79 +198,12 @@ Current date: {current_date}""".format(current_date=datetime.now().strftime("%Y-
                     # Update memory with recent chat history
                     self._update_memory_from_history(chat_history)
                     
-                    # Get response from AWS Bedrock
-                    llm_response = self.conversation.predict(input=message).strip()
-                    print('xxxxxxxxxxxxxxxxx',llm_response)
-                    if "<<BASIC_QUERY>>" in llm_response:
-                        # Use RAG system to answer basic queries
-                        print(f"DEBUG: RAG system initialized: {self.rag_system.is_initialized() if self.rag_system else False}")
-                        if self.rag_system and self.rag_system.is_initialized():
-                            print(f"DEBUG: Searching for query: {message}")
-                            # First test the search directly
-                            search_results = self.rag_system.search_similar_documents(message, top_k=3)
-                            print(f"DEBUG: Found {len(search_results)} documents")
-                            
-                            rag_response = self.rag_system.generate_rag_response(message, self.conversation)
-                            if "<<BASIC_QUERY>>" in rag_response:
-                                rag_response = rag_response.replace("<<BASIC_QUERY>>", "")
-                            return rag_response
-                        else:
-                            # Fallback response when RAG is not available
-                            return "I'd be happy to help with your home loan query. However, our knowledge base is currently unavailable. Please contact our support team for detailed information about home loans, interest rates, eligibility criteria, and documentation requirements."
-                    elif "<<APPLICATION_FORM>>" in llm_response:
-                    # First check if we've already asked about existing customer status
-                        if "is_existing_customer" not in st.session_state:
-                            st.session_state.show_existing_customer_question = True
-                            return "Are you an existing customer? (Please select below)"
-                        else:
-                            # If we know they're existing, show update button
-                            if st.session_state.is_existing_customer:
-                                st.session_state.show_update_button = True
-                                st.session_state.application_mode = "update"
-                                return "I see you're an existing customer. Please provide your application token to update your details."
-                            # Otherwise show new application button
-                            else:
-                                st.session_state.show_form_button = True
-                                st.session_state.application_mode = "new"
-                                return "I can help you apply for a home loan. Please provide the following details:"
-                    elif "<<REQUEST_TOKEN>>" in llm_response:
-                        action = llm_response.split("<<REQUEST_TOKEN>>")[1].strip().lower()
-                        if action.lower() in ["upload", "[upload]"]:
-                            st.session_state.show_upload_button = True
-                        if action.lower() in ["cancel", "[cancel]"]:
-                            st.session_state.show_cancel_button = True
-                            return f"How can i assist you further?."
-                        elif action.lower() in ["update", "[update]"]:
-                            st.session_state.show_update_button = True
-                        
-                        return f"Please provide your application token number (format: HL followed by 13 digits) so I can assist you with {action}."
-                    elif "<<STATUS_REQUEST>>" in llm_response:
-                        return "Please provide your application token number (format: HL followed by 13 digits) so I can assist you with status request."
-                    elif "<<FOUND_TOKEN>>" in llm_response:
-                        parts = llm_response.split("<<FOUND_TOKEN>>")[1].strip().split()
-                        token = parts[0]
-                        action = parts[1] if len(parts) > 1 else "view"
-                        if not re.match(r'^HL\d{13}$', token):
-                            return "Invalid token format. Please provide a valid token (HL followed by 13 digits)."
-                        return self.handle_token_query(token, message)
-                    elif "<<UPLOAD_DOCUMENTS>>" in llm_response or "<<REQUEST_DOCUMENT_ACTION>>" in llm_response:
-                        if "<<REQUEST_DOCUMENT_ACTION>>" in llm_response:
-                            # Case where user asked about documents but didn't provide token
-                            st.session_state.show_upload_button = True
-                            return "Please provide your application token to upload or update documents."
-                        elif "<<UPLOAD_DOCUMENTS>>" in llm_response:
-                            token_match = re.search(r'HL\d{13}', llm_response)
-                            if token_match:
-                                token = token_match.group(0)
-                                if re.match(r'^HL\d{13}$', token):
-                                    st.session_state.current_view = "document_upload"
-                                    st.session_state.show_upload_button = False
-                                    st.session_state.upload_token = token
-                                    
-                                    return f"Ready to upload documents for application. "
-                            return "Please provide a valid application token to upload documents."
-                    # Default case - return the LLM's response
-                    return llm_response
+                    # Get response from AWS Bedrock, unless the routing decision is cached
+                    llm_response = self._cached_llm_reply(message, chat_history)
+                    if llm_response is None:
+                        llm_response = self.conversation.predict(input=message).strip()
+                        self._remember_llm_reply(message, chat_history, llm_response)
+                    return self._route_llm_response(message, llm_response)
                 except Exception as e:
                     st.error(f"Error getting response from LLM: {str(e)}")
                     # Fall through to basic response
@@ -240,6 +215,129 @@ Current date: {current_date}""".format(current_date=datetime.now().strftime("%Y-
             st.error(f"Unexpected error: {str(e)}")
             return "I encountered an error processing your request. Please try again."
 
+    async def aget_response(self, message: str, chat_history: list) -> str:
+        """Async variant of get_response; awaits the Bedrock call instead of blocking on it"""
+        if st.session_state.get('current_view') == 'document_upload':
+            return ""
+
+        try:
+            if self.llm and self.conversation:
+                retrieval = None
+                try:
+                    self._update_memory_from_history(chat_history)
+                    llm_response = self._cached_llm_reply(message, chat_history)
+                    if llm_response is None:
+                        # Start the vector search while Bedrock decides how to route the message.
+                        # A worker-thread search cannot be cancelled, so skip messages that are
+                        # almost never knowledge-base questions (token lookups, one-word replies)
+                        if (self.rag_system and self.rag_system.is_initialized()
+                                and _may_need_retrieval(message)):
+                            retrieval = asyncio.create_task(self.rag_system.asearch_similar_documents(
+                                message, top_k=3, payload_fields=RAG_PAYLOAD_FIELDS))
+                        llm_response = (await self.conversation.apredict(input=message)).strip()
+                        self._remember_llm_reply(message, chat_history, llm_response)
+                    if "<<BASIC_QUERY>>" in llm_response and self.rag_system and self.rag_system.is_initialized():
+                        rag_response = await self.rag_system.agenerate_rag_response(
+                            message, self.conversation, retrieval)
+                        retrieval = None
+                        return rag_response.replace("<<BASIC_QUERY>>", "")
+                    return self._route_llm_response(message, llm_response)
+                except Exception as e:
+                    st.error(f"Error getting response from LLM: {str(e)}")
+                finally:
+                    if retrieval is not None:
+                        retrieval.cancel()
+
+            return self._fallback_response(message)
+
+        except Exception as e:
+            st.error(f"Unexpected error: {str(e)}")
+            return "I encountered an error processing your request. Please try again."
+
+    def _cached_llm_reply(self, message: str, chat_history: list):
+        with _LLM_REPLY_CACHE_LOCK:
+            return _LLM_REPLY_CACHE.get(_reply_cache_key(message, chat_history))
+
+    def _remember_llm_reply(self, message: str, chat_history: list, llm_response: str):
+        # Free-text answers are not deterministic enough to replay, so only cache pure routing markers
+        if llm_response.startswith("<<"):
+            with _LLM_REPLY_CACHE_LOCK:
+                _LLM_REPLY_CACHE[_reply_cache_key(message, chat_history)] = llm_response
+
+    def _route_llm_response(self, message: str, llm_response: str) -> str:
+        """Act on the control marker in the LLM reply, or return the reply as-is"""
+        print('xxxxxxxxxxxxxxxxx',llm_response)
+        if "<<BASIC_QUERY>>" in llm_response:
+            # Use RAG system to answer basic queries
+            print(f"DEBUG: RAG system initialized: {self.rag_system.is_initialized() if self.rag_system else False}")
+            if self.rag_system and self.rag_system.is_initialized():
+                print(f"DEBUG: Searching for query: {message}")
+                # First test the search directly
+                search_results = self.rag_system.search_similar_documents(message, top_k=3)
+                print(f"DEBUG: Found {len(search_results)} documents")
+                
+                rag_response = self.rag_system.generate_rag_response(message, self.conversation)
+                if "<<BASIC_QUERY>>" in rag_response:
+                    rag_response = rag_response.replace("<<BASIC_QUERY>>", "")
+                return rag_response
+            else:
+                # Fallback response when RAG is not available
+                return "I'd be happy to help with your home loan query. However, our knowledge base is currently unavailable. Please contact our support team for detailed information about home loans, interest rates, eligibility criteria, and documentation requirements."
+        elif "<<APPLICATION_FORM>>" in llm_response:
+        # First check if we've already asked about existing customer status
+            if "is_existing_customer" not in st.session_state:
+                st.session_state.show_existing_customer_question = True
+                return "Are you an existing customer? (Please select below)"
+            else:
+                # If we know they're existing, show update button
+                if st.session_state.is_existing_customer:
+                    st.session_state.show_update_button = True
+                    st.session_state.application_mode = "update"
+                    return "I see you're an existing customer. Please provide your application token to update your details."
+                # Otherwise show new application button
+                else:
+                    st.session_state.show_form_button = True
+                    st.session_state.application_mode = "new"
+                    return "I can help you apply for a home loan. Please provide the following details:"
+        elif "<<REQUEST_TOKEN>>" in llm_response:
+            action = llm_response.split("<<REQUEST_TOKEN>>")[1].strip().lower()
+            if action.lower() in ["upload", "[upload]"]:
+                st.session_state.show_upload_button = True
+            if action.lower() in ["cancel", "[cancel]"]:
+                st.session_state.show_cancel_button = True
+                return f"How can i assist you further?."
+            elif action.lower() in ["update", "[update]"]:
+                st.session_state.show_update_button = True
+            
+            return f"Please provide your application token number (format: HL followed by 13 digits) so I can assist you with {action}."
+        elif "<<STATUS_REQUEST>>" in llm_response:
+            return "Please provide your application token number (format: HL followed by 13 digits) so I can assist you with status request."
+        elif "<<FOUND_TOKEN>>" in llm_response:
+            parts = llm_response.split("<<FOUND_TOKEN>>")[1].strip().split()
+            token = parts[0]
+            action = parts[1] if len(parts) > 1 else "view"
+            if not TOKEN_RE.match(token):
+                return "Invalid token format. Please provide a valid token (HL followed by 13 digits)."
+            return self.handle_token_query(token, message)
+        elif "<<UPLOAD_DOCUMENTS>>" in llm_response or "<<REQUEST_DOCUMENT_ACTION>>" in llm_response:
+            if "<<REQUEST_DOCUMENT_ACTION>>" in llm_response:
+                # Case where user asked about documents but didn't provide token
+                st.session_state.show_upload_button = True
+                return "Please provide your application token to upload or update documents."
+            elif "<<UPLOAD_DOCUMENTS>>" in llm_response:
+                token_match = TOKEN_SEARCH_RE.search(llm_response)
+                if token_match:
+                    token = token_match.group(0)
+                    if TOKEN_RE.match(token):
+                        st.session_state.current_view = "document_upload"
+                        st.session_state.show_upload_button = False
+                        st.session_state.upload_token = token
+                        
+                        return f"Ready to upload documents for application. "
+                return "Please provide a valid application token to upload documents."
+        # Default case - return the LLM's response
+        return llm_response
+
     def _update_memory_from_history(self, chat_history: list):
         try:
             if not self.memory:
@@ -248,7 +346,7 @@ Current date: {current_date}""".format(current_date=datetime.now().strftime("%Y-
             self.memory.clear()
             
             if chat_history:
-                for msg in chat_history[-10:]:
+                for msg in chat_history[-HISTORY_WINDOW:]:
                     if msg.get("role") == "user":
                         self.memory.chat_memory.add_user_message(msg.get("content", ""))
                     elif msg.get("role") == "assistant":
@@ -291,7 +389,7 @@ Current date: {current_date}""".format(current_date=datetime.now().strftime("%Y-
         clean_token_val = clean_token(token)
         
         # Validate token format
-        if not clean_token_val or not re.match(r'^HL\d{13}$', clean_token_val):
+        if not clean_token_val or not TOKEN_RE.match(clean_token_val):
             return "Invalid token format. Please provide a valid token (HL followed by 13 digits)."
         
         # Check application existence (session cache or S3)
@@ -59,11 +59,10 @@ export interface ApplicationResponse {
   message: string;
   application_id?: string;
 }
+// Shape returned by POST /api/application/{id}/documents; direct S3 uploads mirror it
 export interface DocumentUploadResponse {
-  success: boolean;
-  message: string;
-  file?: UploadedFile;
-  s3_path?: string;
+  status: string;
+  s3_path: string;
 }
 
 // Chat API
@@ -105,12 +104,53 @@ export const getApplication = async (sessionId: string, applicationId: string):
   const response = await api.get<ApplicationFormData>(`/api/application/${sessionId}/${applicationId}`);
   return response.data;
 };
-// In frontend/src/services/api.ts
+export interface PresignedUpload {
+  upload_url: string;
+  content_type: string;
+  s3_path: string;
+}
+
+// Upload straight to S3 through a presigned PUT so the file is not relayed by the API server.
+// Falls back to the server-side upload if the direct PUT fails (e.g. bucket CORS not configured).
 export const uploadDocument = async (
   file: File,
   sessionId: string,
   applicationId: string,
   docType: string
+): Promise<DocumentUploadResponse> => {
+  try {
+    const presignForm = new FormData();
+    presignForm.append('session_id', sessionId);
+    presignForm.append('doc_type', docType);
+    presignForm.append('filename', file.name);
+    const { data } = await api.post<PresignedUpload>(
+      `/api/application/${applicationId}/documents/presign`,
+      presignForm,
+      {
+        headers: {
+          'Content-Type': 'multipart/form-data',
+        },
+      }
+    );
+    const putResponse = await fetch(data.upload_url, {
+      method: 'PUT',
+      headers: { 'Content-Type': data.content_type },
+      body: file,
+    });
+    if (putResponse.ok) {
+      return { status: 'success', s3_path: data.s3_path };
+    }
+  } catch (err) {
+    console.warn('Direct S3 upload failed, uploading through the server instead', err);
+  }
+  return uploadDocumentViaServer(file, sessionId, applicationId, docType);
+};
+
+const uploadDocumentViaServer = async (
+  file: File,
+  sessionId: string,
+  applicationId: string,
+  docType: string
 ): Promise<DocumentUploadResponse> => {
   const formData = new FormData();
   formData.append('file', file);
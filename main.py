@@ -1,95 +1,132 @@
 import streamlit as st
 import os
 import time
-import boto3
 from datetime import datetime
-import re
-from typing import Dict, Any, List
-import json
-from s3_manager import S3ApplicationManager
+from typing import Any, Optional
+import asyncio
+import threading
+import base64
+import math
+from dataclasses import dataclass
+import html
+from functools import lru_cache
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from s3_manager import S3ApplicationManager, clean_token, is_valid_token
 from orchestration_agent import HomeLoanOrchestrator
-from chatbot import HomeLoanChatbot
+from chatbot import HomeLoanChatbot, LANGCHAIN_AVAILABLE
 from utils import * 
-from graphviz import Digraph
-from langchain_aws import ChatBedrock
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from langchain.memory import ConversationBufferWindowMemory
-from langchain.chains import ConversationChain
-from langchain.prompts import PromptTemplate
-LANGCHAIN_AVAILABLE = True
 
 # Configure page
 st.set_page_config(
     page_title="Home Loan Assistant",
     layout="wide"
 )
-def clean_token(token: str) -> str:
-    """Clean and standardize token format"""
-    if not token:
-        return ""
-    return str(token).strip().upper()
 # Initialize session state
-if 'chat_history' not in st.session_state:
-    st.session_state.chat_history = [{
-        "role": "assistant",
-        "content": "Hello! I'm your Home Loan Assistant. I can help you with information about home loans, eligibility, interest rates, and more. How can I assist you today?"
-    }]
-if 'applications' not in st.session_state:
-    st.session_state.applications = {}
-if 'current_view' not in st.session_state:
-    st.session_state.current_view = "chat"
-if 'show_form_button' not in st.session_state:
-    st.session_state.show_form_button = False
-if 'show_update_button' not in st.session_state:
-    st.session_state.show_update_button = False
-if 'show_cancel_button' not in st.session_state:
-    st.session_state.show_cancel_button = False
-if 'show_cancel_confirmation' not in st.session_state:
-    st.session_state.show_cancel_confirmation = False
-if 'show_upload_button' not in st.session_state:
-    st.session_state.show_upload_button = False
+HELLO_MSG = "Hello! I'm your Home Loan Assistant. I can help you with information about home loans, eligibility, interest rates, and more. How can I assist you today?"
+_SESSION_DEFAULTS = {
+    'chat_history': [{"role": "assistant", "content": HELLO_MSG}],
+    'applications': {},
+    'chat_history_sessions': {},
+    'current_view': "chat",
+    'edit_token': None,
+    'upload_token': "",
+    'show_form_button': False,
+    'show_update_button': False,
+    'show_cancel_button': False,
+    'show_cancel_confirmation': False,
+    'show_upload_button': False,
+}
+for _key, _value in _SESSION_DEFAULTS.items():
+    st.session_state.setdefault(_key, _value)
 
 # S3 Configuration
 S3_BUCKET_NAME = "sarma-1"
 S3_PREFIX = "customers_data/"
 
-#Running the orchestration agent
-def run_orchestrator_workflow(form_data: dict, document_paths: dict):
-    """Run the full loan processing workflow"""
-    with st.spinner("Processing your application..."):
-        # Prepare the applicant_data structure
-        applicant_data = {
-            "applicant_name": form_data.get("full_name"),
-            "loan_amount": float(form_data.get("loan_amount", 0)),
-            "monthly_income": float(form_data.get("monthly_income", 0)),
-            "employment_status": form_data.get("employment_status"),
-            "company_name": form_data.get("company_name"),
-            "property_value":  form_data.get("property_value"),
-            "property_details": {
-                "size_sqft": float(form_data.get("property_size_sqft", 0)),
-                "property_type": form_data.get("property_type"),
-                "city": form_data.get("property_location_city"),
-                "area": form_data.get("property_location_area"),
-                "age_years": int(form_data.get("property_age_years", 0)),
-                "condition": form_data.get("property_condition"),
-                "amenities": []  # Add if collected
-            },
-            "pan_number": form_data.get("pan_number"),
-            "aadhar_number": form_data.get("aadhar_number")
+def build_applicant_data(form_data: dict) -> dict:
+    """Prepare the applicant_data structure the orchestrator expects"""
+    return {
+        "applicant_name": form_data.get("full_name"),
+        "loan_amount": float(form_data.get("loan_amount", 0)),
+        "monthly_income": float(form_data.get("monthly_income", 0)),
+        "employment_status": form_data.get("employment_status"),
+        "company_name": form_data.get("company_name"),
+        "property_value":  form_data.get("property_value"),
+        "property_details": {
+            "size_sqft": float(form_data.get("property_size_sqft", 0)),
+            "property_type": form_data.get("property_type"),
+            "city": form_data.get("property_location_city"),
+            "area": form_data.get("property_location_area"),
+            "age_years": int(form_data.get("property_age_years", 0)),
+            "condition": form_data.get("property_condition"),
+            "amenities": []  # Add if collected
+        },
+        "pan_number": form_data.get("pan_number"),
+        "aadhar_number": form_data.get("aadhar_number")
+    }
+
+@st.cache_resource
+def _get_workflow_executor() -> ThreadPoolExecutor:
+    """Process-wide pool that runs workflows off the Streamlit script thread"""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="loan-workflow")
+
+@st.cache_resource
+def _get_orchestrator_slots() -> threading.local:
+    """Per-worker-thread orchestrator slots; progress state is per run, so one instance cannot be shared across workers"""
+    return threading.local()
+
+def _get_orchestrator(slots: threading.local) -> HomeLoanOrchestrator:
+    """Reuse this worker thread's orchestrator (agents and their clients), with progress reset for the new run"""
+    orchestrator = getattr(slots, "orchestrator", None)
+    if orchestrator is None:
+        orchestrator = slots.orchestrator = HomeLoanOrchestrator()
+    orchestrator.reset_progress()
+    return orchestrator
+
+def _execute_workflow(form_data: dict, document_paths: dict, slots: threading.local) -> dict:
+    try:
+        orchestrator = _get_orchestrator(slots)
+        return asyncio.run(orchestrator.arun_workflow(build_applicant_data(form_data), document_paths))
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Workflow execution failed: {str(e)}",
+            "errors": [str(e)]
         }
-        
-        # Initialize and run orchestrator
-        orchestrator = HomeLoanOrchestrator()
-        
-        try:
-            result = orchestrator.run_workflow(applicant_data, document_paths)
-            return result
-        except Exception as e:
-            return {
-                "status": "error",
-                "message": f"Workflow execution failed: {str(e)}",
-                "errors": [str(e)]
-            }
+
+#Running the orchestration agent
+def run_orchestrator_workflow(form_data: dict, document_paths: dict) -> Future:
+    """Start the full loan processing workflow in the background and return its Future"""
+    return _get_workflow_executor().submit(_execute_workflow, form_data, document_paths, _get_orchestrator_slots())
+
+def render_workflow_progress():
+    """Show progress for a background workflow run and switch to results when it finishes"""
+    future = st.session_state.get("workflow_future")
+    if future is None:
+        st.session_state.current_view = "chat"
+        st.rerun()
+    
+    if not future.done():
+        st.subheader("⏳ Processing your application...")
+        st.caption("Validating documents, checking credit and valuing the property. This page updates automatically.")
+        return
+    
+    token = st.session_state.get("upload_token", "")
+    st.session_state.workflow_result = future.result()
+    st.session_state.results_summary = _summarize_results(st.session_state.workflow_result)
+    del st.session_state.workflow_future
+    st.session_state.current_view = "results"
+    st.session_state.chat_history.append({
+        "role": "assistant", 
+        "content": f"All documents for application {token} have been uploaded successfully and results are displaed to you!."})
+    st.rerun()
+
+def render_form_columns(layout, form_data: dict, saved_data: dict):
+    """Render a form section from a FORM_COLUMN_LAYOUTS entry with a single st.columns call"""
+    for column, field_names in zip(st.columns(len(layout)), layout):
+        with column:
+            for name in field_names:
+                form_data[name] = render_form_field(FORM_FIELDS_BY_NAME[name], saved_data.get(name))
 
 # Form field definitions
 def render_application_form(edit_mode=False, existing_data=None):
@@ -101,11 +138,9 @@ def render_application_form(edit_mode=False, existing_data=None):
     col1,back_col = st.columns([5,1])
     with back_col:
         if st.button("← Back to Chat", key="edit_form_back_button"):
-            if 'form_data' in st.session_state:
-                del st.session_state.form_data
+            st.session_state.pop('form_data', None)
             st.session_state.current_view = "chat"
-            if hasattr(st.session_state, 'edit_token'):
-                del st.session_state.edit_token
+            st.session_state.edit_token = None
             st.session_state.show_form_button = False
             st.session_state.show_update_button = False
             st.rerun()
@@ -117,52 +152,11 @@ def render_application_form(edit_mode=False, existing_data=None):
         validation_errors = []
         
         st.markdown("### Personal Information")
-        col1, col2 = st.columns(2)
-
-        with col1:
-            form_data['full_name'] = render_form_field(
-                FORM_FIELDS[0], st.session_state.form_data.get('full_name')
-            )
-            form_data['gender'] = render_form_field(
-                FORM_FIELDS[2], st.session_state.form_data.get('gender')
-            )
-            form_data['phone'] = render_form_field(
-                FORM_FIELDS[4], st.session_state.form_data.get('phone')
-            )
-            form_data['pan_number'] = render_form_field(
-                FORM_FIELDS[6], st.session_state.form_data.get('pan_number')
-            )
-
-        with col2:
-            form_data['date_of_birth'] = render_form_field(
-                FORM_FIELDS[1], st.session_state.form_data.get('date_of_birth')
-            )
-            form_data['email'] = render_form_field(
-                FORM_FIELDS[3], st.session_state.form_data.get('email')
-            )
-            form_data['aadhar_number'] = render_form_field(
-                FORM_FIELDS[5], st.session_state.form_data.get('aadhar_number')
-            )
-            form_data['marital_status'] = render_form_field(
-                FORM_FIELDS[8], st.session_state.form_data.get('marital_status')
-            )
-
-        # New row for loan-related fields before address
-        col1_loans, col2_purpose = st.columns(2)
-        with col1_loans:
-            form_data['existing_loans'] = render_form_field(
-                next(f for f in FORM_FIELDS if f['name'] == 'existing_loans'),
-                st.session_state.form_data.get('existing_loans')
-            )
-        with col2_purpose:
-            form_data['purpose_of_loan'] = render_form_field(
-                next(f for f in FORM_FIELDS if f['name'] == 'purpose_of_loan'),
-                st.session_state.form_data.get('purpose_of_loan')
-            )
+        render_form_columns(FORM_COLUMN_LAYOUTS['personal'], form_data, st.session_state.form_data)
 
         # Address field
         form_data['address'] = render_form_field(
-            FORM_FIELDS[7], st.session_state.form_data.get('address')
+            FORM_FIELDS_BY_NAME['address'], st.session_state.form_data.get('address')
         )
 
         st.markdown("### Employment Information")
@@ -170,62 +164,26 @@ def render_application_form(edit_mode=False, existing_data=None):
 
         with col1:
             form_data['employment_status'] = render_form_field(
-                FORM_FIELDS[9], st.session_state.form_data.get('employment_status')
+                FORM_FIELDS_BY_NAME['employment_status'], st.session_state.form_data.get('employment_status')
             )
         with col2:
             form_data['monthly_income'] = render_form_field(
-                FORM_FIELDS[12], st.session_state.form_data.get('monthly_income')
+                FORM_FIELDS_BY_NAME['monthly_income'], st.session_state.form_data.get('monthly_income')
             )
         with col3:
             if form_data['employment_status'] == 'Salaried':
                 form_data['company_name'] = render_form_field(
-                    FORM_FIELDS[10], st.session_state.form_data.get('company_name'),
+                    FORM_FIELDS_BY_NAME['company_name'], st.session_state.form_data.get('company_name'),
                     form_data['employment_status']
                 )
             elif form_data['employment_status'] == 'Self-Employed':
                 form_data['gst_number'] = render_form_field(
-                    FORM_FIELDS[11], st.session_state.form_data.get('gst_number'),
+                    FORM_FIELDS_BY_NAME['gst_number'], st.session_state.form_data.get('gst_number'),
                     form_data['employment_status']
                 )
 
         st.markdown("### Property Information")
-        col1, col2 = st.columns(2)
-
-        with col1:
-            form_data['property_location_city'] = render_form_field(
-                next(f for f in FORM_FIELDS if f['name'] == 'property_location_city'),
-                st.session_state.form_data.get('property_location_city')
-            )
-            form_data['property_location_area'] = render_form_field(
-                next(f for f in FORM_FIELDS if f['name'] == 'property_location_area'),
-                st.session_state.form_data.get('property_location_area')
-            )
-            form_data['property_type'] = render_form_field(
-                next(f for f in FORM_FIELDS if f['name'] == 'property_type'),
-                st.session_state.form_data.get('property_type')
-            )
-            form_data['property_size_sqft'] = render_form_field(
-                next(f for f in FORM_FIELDS if f['name'] == 'property_size_sqft'),
-                st.session_state.form_data.get('property_size_sqft')
-            )
-
-        with col2:
-            form_data['property_age_years'] = render_form_field(
-                next(f for f in FORM_FIELDS if f['name'] == 'property_age_years'),
-                st.session_state.form_data.get('property_age_years')
-            )
-            form_data['property_condition'] = render_form_field(
-                next(f for f in FORM_FIELDS if f['name'] == 'property_condition'),
-                st.session_state.form_data.get('property_condition')
-            )
-            form_data['property_value'] = render_form_field(
-                next(f for f in FORM_FIELDS if f['name'] == 'property_value'),
-                st.session_state.form_data.get('property_value')
-            )
-            form_data['loan_amount'] = render_form_field(
-                next(f for f in FORM_FIELDS if f['name'] == 'loan_amount'),
-                st.session_state.form_data.get('loan_amount')
-            )
+        render_form_columns(FORM_COLUMN_LAYOUTS['property'], form_data, st.session_state.form_data)
         
         # Create columns for buttons
         col1, col2 = st.columns([1, 3])
@@ -234,26 +192,10 @@ def render_application_form(edit_mode=False, existing_data=None):
             submitted = st.form_submit_button("Update Application" if edit_mode else "Submit Application")
         
         if submitted:
-            validation_errors = []  # Reset validation errors for each submission
-            
             # Perform validation
-            for field in FORM_FIELDS:
-                field_name = field['name']
-                field_value = form_data.get(field_name)
-                
-                if 'required_if' in field:
-                    required_field = field['required_if']['field']
-                    required_value = field['required_if']['value']
-                    if form_data.get(required_field) != required_value:
-                        continue
-                
-                is_valid, error_msg = validate_field(field, field_value)
-                if not is_valid:
-                    validation_errors.append(error_msg)
+            validation_errors = validate_form(form_data)
             
             if validation_errors:
-                # Save current form data to session state
-                st.session_state.form_data = form_data
                 # Display all validation errors
                 for error in validation_errors:
                     st.error(error)
@@ -266,16 +208,15 @@ def render_application_form(edit_mode=False, existing_data=None):
                     st.error("Application manager not available. Please try again.")
                     st.stop()
                         
-                if edit_mode and hasattr(st.session_state, 'edit_token'):
+                if edit_mode and st.session_state.edit_token:
                     token = st.session_state.edit_token
                     if chatbot.s3_manager.update_application(token, form_data):
-                        st.session_state.applications[token].update(form_data)
-                        st.session_state.applications[token]['last_updated'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                        st.session_state.pop("_dashboard_fragments", None)
+                        st.session_state.applications[token].update(form_data, last_updated_epoch=int(time.time()))
                         st.success(f"✅ Application {token} updated successfully!")
                         # Clear form data from session state
-                        if 'form_data' in st.session_state:
-                            del st.session_state.form_data
-                        del st.session_state.edit_token
+                        st.session_state.pop('form_data', None)
+                        st.session_state.edit_token = None
                         st.session_state.current_view = "chat"
                         st.session_state.show_form_button = False
                         st.session_state.show_update_button = False
@@ -283,24 +224,27 @@ def render_application_form(edit_mode=False, existing_data=None):
                         st.error("Failed to update application in S3. Please try again.")
                 else:
                     token = generate_token()
-                    form_data['token'] = token
-                    form_data['submission_time'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    form_data.update({
+                        'token': token,
+                        'submission_time': datetime.now().isoformat(sep=' ', timespec='seconds')
+                    })
                     
                     if chatbot.s3_manager.save_application(token, form_data):
                         st.session_state.applications[token] = form_data
                         st.success(f"✅ Application submitted successfully! with token {token}")
                         st.info("Save this token to check status or edit your application later.")
                         
-                        st.session_state.chat_history.append({
-                            "role": "assistant",
-                            "content": f"Your home loan application has been submitted with token {token}. You can use this token to check status or make edits."
-                            f"To proceed further we need you to upload some documents "
-                        })
-                        
-                        st.session_state.chat_history.append({
-                            "role": "assistant",
-                            "content": "What would you like to do next?"
-                        })
+                        st.session_state.chat_history.extend([
+                            {
+                                "role": "assistant",
+                                "content": f"Your home loan application has been submitted with token {token}. You can use this token to check status or make edits."
+                                f"To proceed further we need you to upload some documents "
+                            },
+                            {
+                                "role": "assistant",
+                                "content": "What would you like to do next?"
+                            },
+                        ])
                         
                         st.session_state.current_view = "document_upload"
                         st.session_state.upload_token = token
@@ -308,8 +252,7 @@ def render_application_form(edit_mode=False, existing_data=None):
                         
                         st.session_state.current_token = token
                         # Clear form data from session state
-                        if 'form_data' in st.session_state:
-                            del st.session_state.form_data
+                        st.session_state.pop('form_data', None)
                         st.session_state.current_view = "chat"
                         st.session_state.show_form_button = False
                         st.session_state.show_update_button = False
@@ -323,14 +266,54 @@ def render_application_form(edit_mode=False, existing_data=None):
             with col2:
                 if st.form_submit_button("Cancel", type="secondary"):
                     # Clear form data from session state
-                    if 'form_data' in st.session_state:
-                        del st.session_state.form_data
+                    st.session_state.pop('form_data', None)
                     st.session_state.current_view = "chat"
-                    if hasattr(st.session_state, 'edit_token'):
-                        del st.session_state.edit_token
+                    st.session_state.edit_token = None
                     st.session_state.show_form_button = False
                     st.session_state.show_update_button = False
                     st.rerun()
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_list_documents(_s3_manager: S3ApplicationManager, token: str) -> list:
+    """List a token's documents, reused across reruns until cleared or 30s pass"""
+    return _s3_manager.list_documents(token) or []
+
+REQUIRED_DOCS = {
+    "PAN": {
+        "description": "PAN Card (Front)",
+        "types": ["jpg", "png", "pdf"]
+    },
+    "Aadhaar": {
+        "description": "Aadhaar Card (Front + Back)",
+        "types": ["jpg", "png", "pdf"]
+    },
+    "CompanyID": {
+        "description": "Company ID Card/Letter",
+        "types": ["jpg", "png", "pdf"]
+    },
+    "Payslip": {
+        "description": "Latest Payslip (3 months)",
+        "types": ["pdf","png", "jpg"]
+    }
+}
+
+def _previous_documents(doc_types, uploaded_list: list) -> dict:
+    """Map each doc_type about to be replaced to the names of its earlier uploads"""
+    return {
+        doc_type: [item["name"] for item in uploaded_list
+                   if item.get("name", "").lower().startswith(doc_type.lower())]
+        for doc_type in doc_types
+    }
+
+def _stale_documents(previous: dict, pending_uploads: dict) -> dict:
+    """Per doc_type, the previous files to delete. A previous file that the new upload
+    overwrites in place (same doc type and extension) is left out, so the delete can run
+    alongside the upload without racing it."""
+    new_names = {f"{doc_type}.{os.path.splitext(pending_uploads[doc_type].name)[1][1:].lower()}"
+                 for doc_type in pending_uploads}
+    return {doc_type: [filename for filename in names if filename not in new_names]
+            for doc_type, names in previous.items()}
+
 def render_document_upload(token: str, s3_manager: S3ApplicationManager):
     # Add back to chat button at top
     if st.button("← Back to Chat", key="back_to_chat_top"):
@@ -343,32 +326,11 @@ def render_document_upload(token: str, s3_manager: S3ApplicationManager):
     
     st.subheader(f"📁 Document Upload for Application {token}")
     
-    REQUIRED_DOCS = {
-        "PAN": {
-            "description": "PAN Card (Front)",
-            "types": ["jpg", "png", "pdf"]
-        },
-        "Aadhaar": {
-            "description": "Aadhaar Card (Front + Back)",
-            "types": ["jpg", "png", "pdf"]
-        },
-        "CompanyID": {
-            "description": "Company ID Card/Letter",
-            "types": ["jpg", "png", "pdf"]
-        },
-        "Payslip": {
-            "description": "Latest Payslip (3 months)",
-            "types": ["pdf","png", "jpg"]
-        }
-    }
-    
-    uploaded_files = {
-    doc['name'].split('.')[0]: doc['s3_path']
-    for doc in (s3_manager.list_documents(token) or [])
-}
-    uploaded_list = s3_manager.list_documents(token) or []
-    
+    uploaded_list = _cached_list_documents(s3_manager, token)
+    uploaded_files = {doc['name'].partition('.')[0]: doc['s3_path'] for doc in uploaded_list}
 
+    pending_uploads = {}
+    status_slots = {}
     for doc_type, config in REQUIRED_DOCS.items():
         st.markdown(f"### {doc_type}")
         st.caption(config["description"])
@@ -378,28 +340,39 @@ def render_document_upload(token: str, s3_manager: S3ApplicationManager):
             type=config["types"],
             key=f"upload_{doc_type}"
         )
+        status_slots[doc_type] = st.container()
         
         if uploaded_file:
-            try:
-                # Delete all files from uploaded_list containing doc_type in their name (any extension)
-                for item in uploaded_list:
-                    filename = item.get("name", "")
-                    if filename.lower().startswith(doc_type.lower()): 
-                        actual_filename = token + "_" + filename    
-                        s3_manager.delete_document(token, actual_filename)
+            pending_uploads[doc_type] = uploaded_file
+
+    # Replace documents in two batches that run side by side: one DeleteObjects request for
+    # the previous versions, and one TransferManager upload for every new file.
+    if pending_uploads:
+        stale = _stale_documents(_previous_documents(pending_uploads, uploaded_list), pending_uploads)
+        stale_keys = [f"{token}_{filename}" for names in stale.values() for filename in names]
+        deleted = set()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            delete_future = executor.submit(s3_manager.delete_documents, token, stale_keys) if stale_keys else None
+            uploaded, failed = s3_manager.upload_documents(token, pending_uploads)
+            if delete_future is not None:
+                deleted.update(delete_future.result())
+        for doc_type, names in stale.items():
+            with status_slots[doc_type]:
+                for filename in names:
+                    if f"{token}_{filename}" in deleted:
                         st.warning(f"Deleted previous file: {filename}")
-                        if doc_type in uploaded_files:
-                            del uploaded_files[doc_type]
-
-                # Upload new file to S3
-                print(token,uploaded_file,doc_type)
-                print("token:",token,"uploaded_file:",uploaded_file,"doc_type:",doc_type)
-                s3_path = s3_manager.upload_document(token, uploaded_file, doc_type)
-                uploaded_files[doc_type] = s3_path
+        
+        for doc_type, error in failed.items():
+            with status_slots[doc_type]:
+                st.error(f"Failed to upload {doc_type}: {str(error)}")
+        for doc_type, s3_path in uploaded.items():
+            uploaded_files[doc_type] = s3_path
+            with status_slots[doc_type]:
                 st.success(f"{doc_type} uploaded successfully to: {s3_path}")
-
-            except Exception as e:
-                st.error(f"Failed to upload {doc_type}: {str(e)}")
+        
+        # Uploads changed the prefix; drop the cached listing and re-read it
+        _cached_list_documents.clear()
+        uploaded_list = _cached_list_documents(s3_manager, token)
     
     # Display uploaded documents
     st.divider()
@@ -409,15 +382,17 @@ def render_document_upload(token: str, s3_manager: S3ApplicationManager):
     
     if uploaded_list:
         for doc in uploaded_list:
-            doc_name = doc['name'].split('_')[-1].split('.')[0]
+            doc_name = doc['name'].rpartition('_')[2].partition('.')[0]
             col1, col2 = st.columns([4, 1])
             with col1:
                 st.markdown(f"- **{doc_name}** ({doc['size']/1024:.1f} KB)")
             with col2:
                 if st.button("Delete", key=f"del_{doc['name']}"):
                     actual_file_name = token + "_" + doc['name']
-                    print(token,actual_file_name)
                     s3_manager.delete_document(token, actual_file_name)
+                    # Re-run so the listing above is re-read once, without the deleted file
+                    _cached_list_documents.clear()
+                    st.rerun()
                     
     else:
         st.warning("No documents uploaded yet")
@@ -428,19 +403,14 @@ def render_document_upload(token: str, s3_manager: S3ApplicationManager):
             st.error("Please upload all required documents first")
             return
             
-        form_data = s3_manager.get_application(token)
+        form_data = _load_application(token)
         if not form_data:
             st.error("Application data not found!")
             return
         
         # Use the exact S3 paths we got from upload_document()
-        print(form_data)
-        result = run_orchestrator_workflow(form_data, uploaded_files)
-        st.session_state.workflow_result = result
-        st.session_state.current_view = "results"
-        st.session_state.chat_history.append({
-            "role": "assistant", 
-            "content": f"All documents for application {token} have been uploaded successfully and results are displaed to you!."})
+        st.session_state.workflow_future = run_orchestrator_workflow(form_data, uploaded_files)
+        st.session_state.current_view = "processing"
         st.rerun()
     
     if st.button("← Back to Application"):
@@ -451,32 +421,70 @@ def render_document_upload(token: str, s3_manager: S3ApplicationManager):
         st.session_state.current_view = "chat"
         st.rerun()
 
+def _probe_aws_credentials(region_name: str, s3_client) -> bool:
+    import boto3
+    boto3.client('sts', region_name=region_name).get_caller_identity()
+    s3_client.list_objects_v2(Bucket=S3_BUCKET_NAME, MaxKeys=1)
+    return True
+
+@st.cache_resource(show_spinner=False)
+def verify_aws_credentials(region_name: str) -> Future:
+    """Start the STS/S3 credential probe once per process on its own thread, so it
+    overlaps with building the chatbot instead of running before it. Not on the workflow
+    pool: with every worker busy the chat page would wait behind running workflows"""
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="aws-probe")
+    # Probe through the shared manager's pooled S3 client so the probe also warms its connections
+    future = executor.submit(_probe_aws_credentials, region_name, _get_s3_manager().s3)
+    # The worker thread exits once the probe finishes
+    executor.shutdown(wait=False)
+    return future
+
+@st.cache_resource
+def _get_bedrock_client(region_name: str):
+    """One bedrock-runtime client (and connection pool) per process; boto3 clients are thread-safe"""
+    import boto3
+    return boto3.client(service_name="bedrock-runtime", region_name=region_name)
+
+def get_chatbot(region_name: str) -> HomeLoanChatbot:
+    """This session's chatbot; its conversation memory must never be shared between
+    applicants, so only the stateless AWS clients and RAG system come from process caches"""
+    chatbot = st.session_state.get('chatbot')
+    if chatbot is None or chatbot.region_name != region_name:
+        chatbot = HomeLoanChatbot(
+            region_name=region_name,
+            bedrock_client=_get_bedrock_client(region_name),
+            s3_manager=_get_s3_manager()
+        )
+        st.session_state.chatbot = chatbot
+    return chatbot
+
+MAX_VISIBLE_MESSAGES = 20
+
 def render_chat_interface():
+    region_name = "us-east-1"
+    ss = st.session_state
+    if LANGCHAIN_AVAILABLE:
+        credentials_check = verify_aws_credentials(region_name)
+
+    try:
+        chatbot, chatbot_error = get_chatbot(region_name), None
+    except Exception as e:
+        chatbot, chatbot_error = None, e
+
     if LANGCHAIN_AVAILABLE:
-        region_name = "us-east-1"
         try:
-            sts_client = boto3.client('sts', region_name=region_name)
-            identity = sts_client.get_caller_identity()
-            
-            s3 = boto3.client('s3', region_name=region_name)
-            s3.list_objects_v2(Bucket=S3_BUCKET_NAME, MaxKeys=1)
+            credentials_check.result()
         except Exception as e:
+            # Drop the failed probe so the next rerun retries it
+            verify_aws_credentials.clear()
             st.error(f"❌ AWS Credentials Error: {str(e)}")
     else:
         st.error("LangChain AWS not available")
-        region_name = "us-east-1"
 
-    try:
-        if LANGCHAIN_AVAILABLE and ('chatbot' not in st.session_state or st.session_state.get('current_region') != region_name):
-            st.session_state.chatbot = HomeLoanChatbot(region_name=region_name)
-            st.session_state.current_region = region_name
-        elif not LANGCHAIN_AVAILABLE:
-            st.session_state.chatbot = HomeLoanChatbot()
-        
-        chatbot = st.session_state.chatbot
-    except Exception as e:
-        st.error(f"Failed to initialize chatbot: {str(e)}")
+    if chatbot_error is not None:
+        st.error(f"Failed to initialize chatbot: {str(chatbot_error)}")
         return
+    ss.chatbot = chatbot
     
     if LANGCHAIN_AVAILABLE:
         if not chatbot.llm:
@@ -490,61 +498,71 @@ def render_chat_interface():
     for i, question in enumerate(SAMPLE_QUESTIONS):
         with cols[i % 3]:
             if st.button(question, key=f"sample_{i}"):
-                st.session_state.chat_history.append({"role": "user", "content": question})
+                ss.chat_history.append({"role": "user", "content": question})
                 with st.spinner("Thinking..."):
-                    response = chatbot.get_response(question, st.session_state.chat_history)
-                st.session_state.chat_history.append({"role": "assistant", "content": response})
+                    response = asyncio.run(chatbot.aget_response(question, ss.chat_history))
+                ss.chat_history.append({"role": "assistant", "content": response})
                 st.rerun()
   
-    for msg in st.session_state.get("chat_history", []):
-        with st.chat_message(msg["role"]):
-            st.markdown(msg["content"])
+    # One parent container for the transcript: Streamlit diffs elements by position,
+    # so unchanged messages are not re-sent, and new turns are appended into it directly.
+    history_container = st.container()
+    with history_container:
+        history = ss.get("chat_history", [])
+        # Keep the latest turns in view and fold older ones behind an expander
+        if len(history) > MAX_VISIBLE_MESSAGES:
+            with st.expander(f"Show earlier {len(history) - MAX_VISIBLE_MESSAGES} messages"):
+                for msg in history[:-MAX_VISIBLE_MESSAGES]:
+                    st.chat_message(msg["role"]).markdown(msg["content"])
+        for msg in history[-MAX_VISIBLE_MESSAGES:]:
+            with st.chat_message(msg["role"]):
+                st.markdown(msg["content"])
             
     # Display post-submission buttons if they exist
-    if 'post_submission_buttons' in st.session_state and st.session_state.post_submission_buttons:
+    if 'post_submission_buttons' in ss and ss.post_submission_buttons:
         col1, col2 = st.columns([1,1])
         with col1:
-            if st.button(st.session_state.post_submission_buttons[0]["label"]):
-                st.session_state.current_view = "document_upload"
-                st.session_state.upload_token = st.session_state.current_token
-                st.session_state.current_token = st.session_state.current_token  # Ensure current_token is set
+            if st.button(ss.post_submission_buttons[0]["label"]):
+                ss.current_view = "document_upload"
+                ss.upload_token = ss.current_token
+                ss.current_token = ss.current_token  # Ensure current_token is set
                 st.rerun()
         with col2:
-            if st.button(st.session_state.post_submission_buttons[1]["label"]):
-                del st.session_state.post_submission_buttons
+            if st.button(ss.post_submission_buttons[1]["label"]):
+                del ss.post_submission_buttons
                 st.rerun()
     
-    if st.session_state.show_form_button:
+    if ss.show_form_button:
         # Create columns for side-by-side buttons
         col1, col2 = st.columns([1, 1])
         with col1:
             if st.button("📝 Apply for Home Loan", 
                         use_container_width=True, 
                         key="apply_button"):  # Stable key
-                st.session_state.current_view = "application_form"
+                ss.current_view = "application_form"
                 st.rerun()
         with col2:
             if st.button("← Back to Chat", 
                         use_container_width=True, 
                         key="back_button"):  # Stable key
-                st.session_state.show_form_button = False
-                st.session_state.chat_history.append({
+                ss.show_form_button = False
+                ss.chat_history.append({
                     "role": "assistant",
                     "content": "Would you like to ask something else about home loans?"
                 })
                 st.rerun()
-    if st.session_state.get("show_existing_customer_question", False):
+    if ss.get("show_existing_customer_question", False):
         st.write("Are you an existing customer?")
         col1, col2 = st.columns([1, 1])
         with col1:
             if st.button("Yes, I have an existing application",use_container_width=True):
-                st.session_state.is_existing_customer = True
-                st.session_state.show_existing_customer_question = False
-                st.session_state.chat_history.append({
+                ss.is_existing_customer = True
+                ss.show_existing_customer_question = False
+                ss.chat_history.append({
                     "role": "user",
                     "content": "I'm an existing customer"
                 })
-                st.session_state.chat_history.append({
+                ss.chat_history.append({
                     "role": "assistant",
                     "content": "I see you are a exixting customer.Please provide your application token number (format: HL followed by 13 digits) so I can assist you further."
                 })
@@ -553,17 +571,17 @@ def render_chat_interface():
                 st.rerun()
         with col2:
             if st.button("No, I'm a new customer",use_container_width=True):
-                st.session_state.is_existing_customer = False
-                st.session_state.show_existing_customer_question = False
+                ss.is_existing_customer = False
+                ss.show_existing_customer_question = False
 
-                st.session_state.chat_history.append({
+                ss.chat_history.append({
                     "role": "user",
                     "content": "I'm a new customer"
                 })
 
-                st.session_state.show_form_button= True
+                ss.show_form_button= True
                 st.rerun()
-    if st.session_state.show_update_button:
+    if ss.show_update_button:
         token_input = st.text_input(
             "Application token:", 
             key="update_token_input_field",
@@ -576,17 +594,17 @@ def render_chat_interface():
             if st.button("🔍 Find Application", use_container_width=True, key="find_app_button"):
                 if token_input:
                     clean_token_val = clean_token(token_input)  # Use clean_token function
-                    if not clean_token_val:
-                        st.error("Please enter a valid token")
+                    if not is_valid_token(clean_token_val):
+                        st.error("Please enter a valid token (HL followed by 13 digits)")
                     else:
                         with st.spinner("Searching for application..."):
-                            app_data = st.session_state.chatbot.s3_manager.get_application(clean_token_val)
+                            app_data = _load_application(clean_token_val)
                             
                         if app_data:
-                            st.session_state.applications[clean_token_val] = app_data
-                            st.session_state.edit_token = clean_token_val
-                            st.session_state.current_view = "edit_form"
-                            st.session_state.show_update_button = False
+                            ss.applications[clean_token_val] = app_data
+                            ss.edit_token = clean_token_val
+                            ss.current_view = "edit_form"
+                            ss.show_update_button = False
                             st.success(f"✅ Application {clean_token_val} found!")
                             st.rerun()
                         else:
@@ -596,10 +614,10 @@ def render_chat_interface():
                     
         with col2:
             if st.button("❌ Cancel", use_container_width=True, key="cancel_update_button"):
-                st.session_state.show_update_button = False
+                ss.show_update_button = False
                 st.rerun()
     
-    if st.session_state.show_upload_button:
+    if ss.show_upload_button:
         st.info("Please enter your application token to upload documents")
         token_input = st.text_input(
             "Application Token:",
@@ -613,41 +631,39 @@ def render_chat_interface():
             if st.button("📤 Proceed to Document Upload", use_container_width=True):
                 if token_input:
                     clean_token_val = clean_token(token_input)  # Use clean_token function
-                    if not clean_token_val:
-                        st.error("Please enter a valid token")
+                    if not is_valid_token(clean_token_val):
+                        st.error("Please enter a valid token (HL followed by 13 digits)")
                     else:
-                        st.session_state.current_view = "document_upload"
-                        st.session_state.upload_token = clean_token_val
+                        ss.current_view = "document_upload"
+                        ss.upload_token = clean_token_val
                         st.rerun()
         with col2:
             if st.button("← Back to Chat", use_container_width=True):
-                st.session_state.show_upload_button = False
+                ss.show_upload_button = False
                 st.rerun()
                 
     if prompt := st.chat_input("Ask me about home loans or use your application token..."):
-        st.session_state.chat_history.append({"role": "user", "content": prompt})
-        with st.chat_message("user"):
-            st.write(prompt)
-        
-        try:
-            with st.spinner("Thinking..."):
-                response = chatbot.get_response(prompt, st.session_state.chat_history)
-            st.session_state.chat_history.append({"role": "assistant", "content": response})
-            with st.chat_message("assistant"):
-                st.write(response)
-        except Exception as e:
-            error_msg = f"Sorry, I encountered an error: {str(e)}. Please try again."
-            st.session_state.chat_history.append({"role": "assistant", "content": error_msg})
-            with st.chat_message("assistant"):
-                st.error(error_msg)
+        ss.chat_history.append({"role": "user", "content": prompt})
+        with history_container:
+            with st.chat_message("user"):
+                st.write(prompt)
+            
+            try:
+                with st.spinner("Thinking..."):
+                    response = asyncio.run(chatbot.aget_response(prompt, ss.chat_history))
+                ss.chat_history.append({"role": "assistant", "content": response})
+                with st.chat_message("assistant"):
+                    st.write(response)
+            except Exception as e:
+                error_msg = f"Sorry, I encountered an error: {str(e)}. Please try again."
+                ss.chat_history.append({"role": "assistant", "content": error_msg})
+                with st.chat_message("assistant"):
+                    st.error(error_msg)
         
         st.rerun()
-def render_results():
-    # Set page config (if not already set elsewhere)
-    st.set_page_config(layout="wide", page_title="Loan Application Results")
-    
-    # Custom CSS for better styling
-    st.markdown("""
+
+# Static styles, built once at import instead of on every rerun
+_RESULTS_CSS = """
     <style>
         .card {
             padding: 20px;
@@ -675,11 +691,6 @@ def render_results():
             background-color: #e3f2fd;
             border-left: 5px solid #2196f3;
         }
-        .metric-card {
-            padding: 15px;
-            border-radius: 8px;
-            background-color: #f5f5f5;
-        }
         .stProgress > div > div > div > div {
             background-color: #4caf50;
         }
@@ -689,15 +700,486 @@ def render_results():
         .tab-content {
             padding: 15px 0;
         }
+        .progress-strip {
+            display: flex;
+            gap: 8px;
+            margin-bottom: 16px;
+        }
+        .progress-strip .step {
+            flex: 1;
+            padding: 12px;
+            border-radius: 6px;
+        }
+        .progress-strip .step.done { background-color: #e8f5e9; color: #2e7d32; }
+        .progress-strip .step.todo { background-color: #e3f2fd; color: #1565c0; }
+        .loan-grid {
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
+            gap: 16px;
+        }
+        .loan-card {
+            min-height: 350px;
+            padding: 15px;
+            border: 1px solid #e0e0e0;
+            border-radius: 8px;
+        }
+        .loan-card h4 { margin-top: 0; }
+        .loan-card .loan-caption { color: #757575; font-size: 13px; }
+        .loan-card.special { border-left: 5px solid #FF4B4B; background-color: #FFF5F5; }
+        .loan-card.premium { border-left: 5px solid #4B8DFF; background-color: #F5F9FF; }
+        .loan-card.standard { border-left: 5px solid #00C853; background-color: #F5FFF7; }
+        .loan-badge { padding: 8px 12px; border-radius: 6px; }
+        .loan-badge.ok { background-color: #e8f5e9; color: #2e7d32; }
+        .loan-badge.warn { background-color: #fff8e1; color: #8d6e00; }
     </style>
-    """, unsafe_allow_html=True)
+"""
+
+_RESULT_TABS = ("📋 Application Overview", "📄 Documents", "🏠 Property", "💳 Credit", "✅ Recommendations")
+
+_PROGRESS_STEPS = ("Document Verification", "Credit Check", "Property Valuation", "Eligibility", "Approval")
+
+# Per document type: display metadata and the (column, raw_data key) pairs shown in the documents table
+_DOC_TYPES = {
+    "PAN": {"icon": "🆔", "title": "PAN Card", "fields": (("Name", "name"), ("Date of Birth", "date_of_birth"))},
+    "Aadhaar": {"icon": "🆔", "title": "Aadhaar Card", "fields": (("Name", "name"), ("Date of Birth", "date_of_birth"))},
+    "Payslip": {"icon": "💰", "title": "Salary Slip", "fields": (("Name", "name"),)},
+    "CompanyID": {"icon": "🏢", "title": "Employment Proof", "fields": (("Name", "name"),)}
+}
+_DOC_TABLE_COLUMNS = ("Name", "Date of Birth")
+_CHECK_STATUS_ICONS = {"Success": "✅", "Warning": "⚠️", "Failure": "❌"}
+
+_CREDIT_TIPS_MD = """
+- **Pay bills on time:** Set up automatic payments for at least the minimum amount due
+- **Reduce credit utilization:** Aim to use less than 30% of your available credit
+- **Avoid new credit applications:** Each hard inquiry can slightly lower your score
+- **Check for errors:** Review your credit report annually for inaccuracies
+- **Keep old accounts open:** Longer credit history improves your score
+"""
+
+_EMI_CSS = "<style>.small-metric { font-size: 14px !important; }</style>"
+
+def _loan_options_html(options: list) -> str:
+    """Recommendation option cards rendered as a single HTML grid"""
+    cards = []
+    for option in options:
+        name = option.get("option", "")
+        if "Special" in name:
+            variant, icon, caption = "special", "⚠️", "Higher interest due to credit risk"
+        elif "Premium" in name:
+            variant, icon, caption = "premium", "✅", "Standard eligibility terms"
+        else:
+            variant, icon, caption = "standard", "✅", "Standard eligibility terms"
+        eligibility = option.get("eligibility", "")
+        if eligibility.lower() == "eligible":
+            badge = '<div class="loan-badge ok">✔️ Eligible (meets all criteria)</div>'
+        else:
+            badge = f'<div class="loan-badge warn">❗ {html.escape(eligibility or "Conditional Approval")}</div>'
+        cards.append(f"""<div class="loan-card {variant}">
+<h4>{icon} {html.escape(name)}</h4>
+<p class="loan-caption">{caption}</p>
+<p><strong>Loan Amount:</strong><br>{html.escape(str(option.get('loan_amount', 'N/A')))}</p>
+<p><strong>Interest Rate:</strong><br>{html.escape(str(option.get('interest_rate', 'N/A')))}</p>
+<p><strong>Tenure:</strong><br>{html.escape(str(option.get('tenure', 'N/A')))} years</p>
+<p><strong>Monthly EMI:</strong><br>{html.escape(str(option.get('monthly_emi', 'N/A')))}</p>
+{badge}
+</div>""")
+    return '<div class="loan-grid">' + "".join(cards) + '</div>'
+
+@lru_cache(maxsize=64)
+def _parse_max_eligible(recommendation: str) -> float:
+    """Max LTV-eligible amount quoted in the recommendation text, 0.0 if absent"""
+    try:
+        amount = recommendation.split("maximum LTV-eligible loan amount is ₹")[1].split(" ")[0]
+        return float(amount.replace(",", ""))
+    except (AttributeError, IndexError, ValueError):
+        return 0.0
+
+@dataclass(frozen=True)
+class ResultsSummary:
+    """Values render_results derives from a workflow result, computed once per result"""
+    max_eligible: float
+    recommended_amount: float
+    risk_level: str
+    risk_score: Any
+    overall_status: str
+    status_color: str
+
+def _summarize_results(result: dict) -> ResultsSummary:
+    results = result.get("results", {})
+    rec_result = results.get("approval_recommendation", {})
+    risk = results.get("credit_score", {}).get("risk_assessment", {})
+    is_eligible = results.get("eligibility", {}).get("is_eligible", False)
+
+    try:
+        recommended_amount = float(rec_result["table"][2]["loan_amount"].replace("₹", "").replace(",", ""))
+    except (KeyError, IndexError, TypeError, ValueError, AttributeError):
+        recommended_amount = 0.0
+
+    if is_eligible:
+        overall_status, status_color = "Approved", "#4CAF50"
+    elif is_eligible is False:
+        overall_status, status_color = "Rejected", "#F44336"
+    else:
+        overall_status, status_color = "Pending", "#FFC107"
+
+    return ResultsSummary(
+        max_eligible=_parse_max_eligible(rec_result.get("recommendation")),
+        recommended_amount=recommended_amount,
+        risk_level=str(risk.get("risk_level", "N/A")).title(),
+        risk_score=risk.get("risk_score", "N/A"),
+        overall_status=overall_status,
+        status_color=status_color,
+    )
+
+def _inr(amount) -> str:
+    """Rupee amount with thousands separators"""
+    return f"₹{amount:,}"
+
+def _property_tab_html(prop_result: dict, app_data: dict) -> str:
+    """Property tab cards (details, method, summary, range) as one two-column HTML grid"""
+    property_data = prop_result.get('property_data', {})
+    estimated_value = prop_result.get('estimated_property_value', 0)
+    estimated_str = _inr(estimated_value)
+    min_str = _inr(int(estimated_value * 0.95))
+    max_str = _inr(int(estimated_value * 1.05))
+    property_value = app_data.get('property_value') or 0
+    ltv = (app_data.get('loan_amount', 0) / property_value * 100) if property_value else 0.0
+    market_comparison = "Used comparable properties" if prop_result.get('used_comparables', False) else "No direct comparables"
+    return f"""
+<div style="display:grid; grid-template-columns:1fr 1fr; gap:20px;">
+<div>
+<div class="card info-card">
+<h3 style="margin-top:0;">🏡 Property Details</h3>
+<div style="display: flex; justify-content: space-between;">
+<div>
+<p><strong>Location:</strong> {property_data.get('city', 'N/A')}, {property_data.get('area', 'N/A')}</p>
+<p><strong>Type:</strong> {property_data.get('property_type', 'N/A')}</p>
+</div>
+<div>
+<p><strong>Size:</strong> {property_data.get('size_sqft', 'N/A')} sq.ft</p>
+<p><strong>Age:</strong> {property_data.get('age_years', 'N/A')} years</p>
+</div>
+</div>
+</div>
+<div class="card" style="margin-top:20px;">
+<h3 style="margin-top:0;">📊 Valuation Method</h3>
+<p><strong>Approach:</strong> {prop_result.get('valuation_method', 'Automated Valuation Model (AVM)')}</p>
+<p><strong>Confidence:</strong> {prop_result.get('confidence_score', 0) * 100:.0f}%</p>
+<p><strong>Market Comparison:</strong> {market_comparison}</p>
+</div>
+</div>
+<div>
+<div class="card success-card">
+<h3 style="margin-top:0;">💰 Valuation Summary</h3>
+<div style="text-align: center;">
+<h1 style="margin:10px 0; color:#4CAF50;">{estimated_str}</h1>
+<p>Estimated Property Value</p>
+</div>
+<div style="display: flex; justify-content: space-between; margin-top:15px;">
+<div style="text-align: center;">
+<h3 style="margin:5px 0;">{_inr(prop_result.get('price_per_sqft', 0))}</h3>
+<p>Per Sq.Ft</p>
+</div>
+<div style="text-align: center;">
+<h3 style="margin:5px 0;">{property_data.get('size_sqft', 0):,}</h3>
+<p>Sq.Ft</p>
+</div>
+<div style="text-align: center;">
+<h3 style="margin:5px 0;">{ltv:.0f}%</h3>
+<p>LTV Ratio</p>
+</div>
+</div>
+</div>
+<div style="margin-top:20px;">
+<h4>Valuation Range</h4>
+<div style="background: #f5f5f5; padding:10px; border-radius:5px;">
+<div style="display:flex; justify-content:space-between; margin-bottom:5px;">
+<span>{min_str}</span>
+<span>{max_str}</span>
+</div>
+<div style="height:10px; background:linear-gradient(90deg, #f44336, #ffeb3b, #4caf50); border-radius:5px; position:relative;">
+<div style="position:absolute; left:50%; top:-5px; width:2px; height:20px; background:#000;"></div>
+</div>
+<div style="text-align:center; margin-top:5px;">
+<span>{estimated_str}</span>
+</div>
+</div>
+</div>
+</div>
+</div>
+"""
+
+def _dashboard_fragments(result: dict, summary: ResultsSummary, clean_token_val: str, app_data: dict) -> dict:
+    """Static HTML blocks of the results dashboard, rebuilt only when the workflow result,
+    token or date changes; widget-driven reruns (EMI sliders, buttons) reuse them as-is"""
+    today = datetime.now().strftime('%Y-%m-%d')
+    cached = st.session_state.get("_dashboard_fragments")
+    if cached and cached[0] is result and cached[1:3] == (clean_token_val, today):
+        return cached[3]
+
+    results = result.get("results", {})
+    current_step = 4 if summary.overall_status == "Approved" else 3
+    fragments = {
+        "header": f"""
+<div class="card" style="border-left: 5px solid {summary.status_color};">
+<h3 style="margin-top:0;">Application Status: <span style="color:{summary.status_color};">{summary.overall_status}</span></h3>
+<div style="display: flex; justify-content: space-between;">
+<div>
+<p><strong>Application ID:</strong> {clean_token_val or 'N/A'}</p>
+<p><strong>Date:</strong> {today}</p>
+</div>
+<div>
+<p><strong>Applicant:</strong> {app_data.get('full_name', 'N/A')}</p>
+<p><strong>Loan Amount:</strong> {_inr(app_data.get('loan_amount', 0))}</p>
+</div>
+</div>
+</div>
+""",
+        "progress": '<div class="progress-strip">' + "".join(
+            f'<span class="step done">✓ {step}</span>' if i <= current_step
+            else f'<span class="step todo">{step}</span>'
+            for i, step in enumerate(_PROGRESS_STEPS)
+        ) + '</div>',
+        "property": _property_tab_html(results.get("property_valuation", {}), app_data),
+        "loan_options": _loan_options_html(results.get("approval_recommendation", {}).get("table") or []),
+    }
+    st.session_state._dashboard_fragments = (result, clean_token_val, today, fragments)
+    return fragments
+
+@lru_cache(maxsize=256)
+def _score_donut_img(score: int, color: str) -> str:
+    """Credit score donut as an <img> with a base64 SVG data URI, built once per (score, color)"""
+    circumference = 2 * math.pi * 67.5
+    filled = circumference * max(0, min(score, 1000)) / 1000
+    svg = (
+        '<svg xmlns="http://www.w3.org/2000/svg" width="150" height="150" viewBox="0 0 150 150">'
+        '<circle cx="75" cy="75" r="67.5" fill="none" stroke="#e0e0e0" stroke-width="15"/>'
+        f'<circle cx="75" cy="75" r="67.5" fill="none" stroke="{color}" stroke-width="15" '
+        f'stroke-dasharray="{filled:.2f} {circumference:.2f}" transform="rotate(-90 75 75)"/>'
+        f'<text x="75" y="75" text-anchor="middle" dominant-baseline="central" '
+        f'font-family="sans-serif" font-size="36" font-weight="bold" fill="{color}">{score}</text>'
+        '</svg>'
+    )
+    encoded = base64.b64encode(svg.encode()).decode()
+    return f'<img src="data:image/svg+xml;base64,{encoded}" width="150" height="150" alt="Credit score {score}"/>'
+
+@st.cache_resource
+def _get_s3_manager() -> S3ApplicationManager:
+    """One S3ApplicationManager (and boto3 client) per process"""
+    return S3ApplicationManager()
+
+def _load_application(token: str) -> Optional[dict]:
+    """Application record, or None when it does not exist. Reads go through the S3 manager's
+    short-lived cache, which save/update/delete invalidate, so a cancelled application is
+    never served from here and misses are not remembered"""
+    return _get_s3_manager().get_application(token)
+
+def _render_overview(summary: ResultsSummary, fragments: dict, app_data: dict, elig_result: dict):
+    st.subheader("Application Summary")
+
+    # Progress tracker
+    st.markdown("### 📌 Application Progress")
+    current_step = 4 if summary.overall_status == "Approved" else 3
+    st.progress(current_step/4)
+
+    st.markdown(fragments["progress"], unsafe_allow_html=True)
+    # Quick stats
+    st.subheader("📊 Quick Statistics")
+    col1, col2 = st.columns(2)
+
+    with col1:
+        with st.expander("📝 Application Details", expanded=True):
+            st.markdown("\n\n".join((
+                f"**Loan Amount Requested:** {_inr(app_data.get('loan_amount', 0))}",
+                f"**Loan Purpose:** {app_data.get('purpose_of_loan', 'N/A')}",
+                f"**Employment Type:** {app_data.get('employment_status', 'N/A')}",
+                f"**Monthly Income:** {_inr(app_data.get('monthly_income', 0))}",
+            )))
+
+    with col2:
+        with st.expander("🔍 Eligibility Summary", expanded=True):
+            st.markdown("\n\n".join((
+                f"**Eligibility Status:** {'✅ Eligible' if elig_result.get('is_eligible') else '❌ Not Eligible'}",
+                f"**Maximum Eligible Amount:** ₹{summary.max_eligible:,.2f}",
+                f"**Recommended Loan Amount:** ₹{summary.recommended_amount:,.2f}",
+                f"**Risk Assessment:** {summary.risk_level} (Score: {summary.risk_score})",
+            )))
+
+def _render_documents(doc_result: dict):
+    st.subheader("Document Verification")
+
+    if not doc_result:
+        st.warning("No document validation results available")
+    else:
+        rows = []
+        notes = []
+        for doc_type, doc_meta in _DOC_TYPES.items():
+            doc_data = doc_result.get("raw_data", {}).get(doc_type, {})
+            if not doc_data:
+                continue
+            is_valid = doc_data.get("is_valid", True)
+            row = {
+                "Document": f"{doc_meta['icon']} {doc_meta['title']}",
+                "Status": "✅ Verified" if is_valid else "❌ Issues Found",
+                **dict.fromkeys(_DOC_TABLE_COLUMNS, ""),
+            }
+            row.update((label, doc_data.get(key, "N/A")) for label, key in doc_meta["fields"])
+            rows.append(row)
+            if "validation_notes" in doc_data:
+                notes.append((doc_meta["title"], doc_data["validation_notes"]))
+        
+        # One table for all documents instead of an expander + HTML card per document
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+        
+        # Cross-document checks from the validator, plus the orchestrator's name match
+        checks = [
+            *doc_result.get("validation", {}).get("checks", []),
+            *doc_result.get("validation_report", {}).get("checks", []),
+        ]
+        if checks:
+            st.markdown("#### Consistency Checks")
+            st.dataframe(
+                [{
+                    "Status": _CHECK_STATUS_ICONS.get(check.get("status"), "❔"),
+                    "Check": check.get("check", ""),
+                    "Value": "" if check.get("value") is None else str(check["value"]),
+                    "Reason": check.get("reason", ""),
+                } for check in checks],
+                hide_index=True,
+                use_container_width=True
+            )
+        
+        if notes:
+            with st.expander("Validation Notes", expanded=False):
+                for title, note in notes:
+                    st.markdown(f"**{title}:**")
+                    st.info(note)
+
+def _render_property(prop_result: dict, fragments: dict):
+    st.subheader("Property Valuation")
+
+    if not prop_result:
+        st.warning("No property valuation results available")
+    else:
+        st.markdown(fragments["property"], unsafe_allow_html=True)
+
+def _render_credit(credit_result: dict):
+    st.subheader("Credit Analysis")
+
+    if not credit_result:
+        st.warning("No credit score results available")
+    else:
+        # The agent may report the score as int, float or str; normalize so the comparisons
+        # below work and equal scores share one _score_donut_img cache entry
+        try:
+            score = int(round(float(credit_result.get('credit_score') or 0)))
+        except (TypeError, ValueError):
+            score = 0
+        score_category = credit_result.get('score_category', 'Average')
+
+        if score >= 750:
+            color = "#4CAF50"  # Green
+        elif score >= 650:
+            color = "#8BC34A"  # Light green
+        elif score >= 550:
+            color = "#FFC107"  # Yellow
+        else:
+            color = "#F44336"  # Red
+
+        st.markdown(f"""
+        <div class="card" style="text-align:center;">
+            <h3 style="margin-top:0;">Your Credit Score</h3>
+            {_score_donut_img(score, color)}
+            <h3 style="color:{color};">{score_category}</h3>
+            <p>{credit_result.get('score_message', '')}</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+        if score < 700:
+            with st.expander("💡 Credit Improvement Tips", expanded=True):
+                st.markdown(_CREDIT_TIPS_MD)
+
+def _render_recommendations(rec_result: dict, fragments: dict):
+    st.subheader("Loan Recommendation")
+
+    st.write(rec_result.get("recommendation"))
+    if not rec_result:
+        st.warning("No recommendation available")
+    elif rec_result.get("status") == "success":
+        # Display scenario analysis if available
+        if "scenario_analysis" in rec_result:
+            with st.expander("📊 Your Financial Scenario Analysis", expanded=True):
+                st.write(rec_result["scenario_analysis"])
+
+        # Display loan options as compact cards
+        if "table" in rec_result and rec_result["table"]:
+            st.markdown("### Available Loan Options")
+
+            # All option cards as one HTML grid instead of per-column widgets
+            st.markdown(fragments["loan_options"], unsafe_allow_html=True)
+
+        # Display offer rationale if available
+        if "offer_rationale" in rec_result:
+            with st.expander("ℹ️ Why these options were recommended", expanded=True):
+                st.write(rec_result["offer_rationale"])
+
+        # Suggested next steps with icons
+        st.divider()
+        st.markdown("### 📝 Suggested Next Steps")
+        st.markdown("""
+        1. **Review** the loan options above  
+        2. **Compare** EMI amounts with your budget  
+        3. **Contact** a loan officer for clarification  
+        4. **Consider** adjusting your amount if needed  
+        """)
+
+        # Additional warnings if applicable
+        recommendation = str(rec_result.get("recommendation", ""))
+        if "LTV exceeded" in recommendation:
+            st.warning("ℹ️ Note: The recommended amount is lower than requested due to LTV limits")
+        elif "not eligible" in recommendation.lower():
+            st.error("🚨 Current application doesn't meet standard eligibility criteria")
+    else:
+        st.error("Recommendation generation failed")
+        st.error(rec_result.get("message", "Unknown error"))
+
+@st.fragment
+def _results_sections(summary: ResultsSummary, fragments: dict, app_data: dict, doc_result: dict,
+                      prop_result: dict, credit_result: dict, elig_result: dict, rec_result: dict):
+    """Section switcher and the selected section's body. As a fragment, switching sections reruns
+    only this function; the header, metrics and sidebar are left as they are."""
+    active_tab = st.radio(
+        "View",
+        _RESULT_TABS,
+        horizontal=True,
+        label_visibility="collapsed",
+        key="results_tab"
+    )
+    
+    if active_tab == _RESULT_TABS[0]:
+        _render_overview(summary, fragments, app_data, elig_result)
+    elif active_tab == _RESULT_TABS[1]:
+        _render_documents(doc_result)
+    elif active_tab == _RESULT_TABS[2]:
+        _render_property(prop_result, fragments)
+    elif active_tab == _RESULT_TABS[3]:
+        _render_credit(credit_result)
+    else:
+        _render_recommendations(rec_result, fragments)
+
+def render_results():
+    # Set page config (if not already set elsewhere)
+    st.set_page_config(layout="wide", page_title="Loan Application Results")
+    
+    # Custom CSS for better styling
+    st.markdown(_RESULTS_CSS, unsafe_allow_html=True)
 
     if 'workflow_result' not in st.session_state:
         st.error("No results available")
         if st.button("← Back to Application"):
             st.session_state.current_view = "chat"
             st.rerun()
-        return
+        st.stop()
     
     result = st.session_state.workflow_result
     results = result.get("results", {})
@@ -706,406 +1188,31 @@ def render_results():
     prop_result = results.get("property_valuation", {})
     elig_result = results.get("eligibility", {})
     rec_result = results.get("approval_recommendation", {})
+    summary = st.session_state.get("results_summary") or _summarize_results(result)
+    max_eligible = summary.max_eligible
 
     # Main header with status
     st.title("📊 Loan Application Dashboard")
     
     # Overall application status card
-    overall_status = "Pending"
-    status_color = "#FFC107"
-    if elig_result.get("is_eligible", False):
-        overall_status = "Approved"
-        status_color = "#4CAF50"
-    elif elig_result.get("is_eligible", False) is False:
-        overall_status = "Rejected"
-        status_color = "#F44336"
-    token = st.session_state.get('upload_token', '')
-    clean_token_val = clean_token(token)
-    s3_manager = S3ApplicationManager()
-    app_data = s3_manager.get_application(clean_token_val)
-    st.markdown(f"""
-    <div class="card" style="border-left: 5px solid {status_color};">
-        <h3 style="margin-top:0;">Application Status: <span style="color:{status_color};">{overall_status}</span></h3>
-        <div style="display: flex; justify-content: space-between;">
-            <div>
-                <p><strong>Application ID:</strong> {st.session_state.get('upload_token', 'N/A')}</p>
-                <p><strong>Date:</strong> {datetime.now().strftime('%Y-%m-%d')}</p>
-            </div>
-            <div>
-                <p><strong>Applicant:</strong> {app_data.get('full_name', 'N/A')}</p>
-                <p><strong>Loan Amount:</strong> ₹{app_data.get('loan_amount', 0):,}</p>
-            </div>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    clean_token_val = clean_token(st.session_state.get('upload_token', ''))
+    app_data = _load_application(clean_token_val) or {}
+    fragments = _dashboard_fragments(result, summary, clean_token_val, app_data)
+    st.markdown(fragments["header"], unsafe_allow_html=True)
 
     # Key metrics row
     st.subheader("📈 Key Metrics")
     col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h4 style="margin:0; color:#2196F3;">Credit Score</h4>
-            <h2 style="margin:0;">{credit_result.get('credit_score', 'N/A')}</h2>
-            <p style="margin:0; font-size:12px;">{credit_result.get('score_category', '')}</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h4 style="margin:0; color:#4CAF50;">Property Value</h4>
-            <h2 style="margin:0;">₹{prop_result.get('estimated_property_value', 0):,}</h2>
-            <p style="margin:0; font-size:12px;">{prop_result.get('price_per_sqft', 0):,}/sq.ft</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        max_eligible = float(rec_result["recommendation"].split("maximum LTV-eligible loan amount is ₹")[1].split(" ")[0].replace(",",""))
-        st.markdown(f"""
-        <div class="metric-card">
-            <h4 style="margin:0; color:#9C27B0;">Loan Eligibility</h4>
-            <h2 style="margin:0;">₹{max_eligible:,.2f}</h2>
-            <p style="margin:0; font-size:12px;">Max amount</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col4:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h4 style="margin:0; color:#FF9800;">Risk Level</h4>
-            <h2 style="margin:0;">{elig_result.get('risk_level', 'Medium')}</h2>
-            <p style="margin:0; font-size:12px;">Based on profile</p>
-        </div>
-        """, unsafe_allow_html=True)
+    # Captions go in the label or tooltip; st.metric's delta always draws a trend arrow
+    score_category = credit_result.get('score_category')
+    col1.metric(f"Credit Score ({score_category})" if score_category else "Credit Score",
+                credit_result.get('credit_score', 'N/A'))
+    col2.metric(f"Property Value ({prop_result.get('price_per_sqft', 0):,}/sq.ft)",
+                f"₹{prop_result.get('estimated_property_value', 0):,}")
+    col3.metric("Loan Eligibility", f"₹{max_eligible:,.2f}", help="Max amount")
+    col4.metric("Risk Level", elig_result.get('risk_level', 'Medium'), help="Based on profile")
 
-    # Results navigation tabs
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
-        "📋 Application Overview", 
-        "📄 Documents", 
-        "🏠 Property", 
-        "💳 Credit", 
-        "✅ Recommendations"
-    ])
-        
-    with tab1:
-        st.subheader("Application Summary")
-        
-        # Progress tracker
-        st.markdown("### 📌 Application Progress")
-        steps = ["Document Verification", "Credit Check", "Property Valuation", "Eligibility", "Approval"]
-        current_step = 4 if overall_status == "Approved" else 3
-        st.progress(current_step/4)
-        
-        cols = st.columns(5)
-        for i, step in enumerate(steps):
-            with cols[i]:
-                if i <= current_step:
-                    st.success(f"✓ {step}")
-                else:
-                    st.info(step)
-        # Quick stats
-        st.subheader("📊 Quick Statistics")
-        col1, col2 = st.columns(2)
-        
-        with col1:
-    
-            with st.expander("📝 Application Details", expanded=True):
-                token = st.session_state.get('upload_token', '')
-                clean_token_val = clean_token(token)
-                s3_manager = S3ApplicationManager()
-                app_data = s3_manager.get_application(clean_token_val)
-                st.write(f"**Loan Amount Requested:** ₹{app_data.get('loan_amount', 0):,}")
-                st.write(f"**Loan Purpose:** {app_data.get('purpose_of_loan', 'N/A')}")
-                st.write(f"**Employment Type:** {app_data.get('employment_status', 'N/A')}")
-                st.write(f"**Monthly Income:** ₹{app_data.get('monthly_income', 0):,}")
-        
-        with col2:
-            with st.expander("🔍 Eligibility Summary", expanded=True):
-                st.write(f"**Eligibility Status:** {'✅ Eligible' if elig_result.get('is_eligible') else '❌ Not Eligible'}")
-                max_eligible = float(rec_result["recommendation"].split("maximum LTV-eligible loan amount is ₹")[1].split(" ")[0].replace(",",""))
-                st.write(f"**Maximum Eligible Amount:** ₹{max_eligible:,.2f}")
-                recommended_amount = float(rec_result["table"][2]["loan_amount"].replace("₹","").replace(",",""))
-                st.write(f"**Recommended Loan Amount:** ₹{recommended_amount:,.2f}")
-                st.write(f"**Risk Assessment:** {credit_result['risk_assessment']['risk_level'].title()} (Score: {credit_result['risk_assessment']['risk_score']})")
-
-    with tab2:
-        st.subheader("Document Verification")
-        
-        if not doc_result:
-            st.warning("No document validation results available")
-        else:
-            # Document cards
-            doc_types = {
-                "PAN": {"icon": "🆔", "title": "PAN Card"},
-                "Aadhaar": {"icon": "🆔", "title": "Aadhaar Card"},
-                "Payslip": {"icon": "💰", "title": "Salary Slip"},
-                "CompanyID": {"icon": "🏢", "title": "Employment Proof"}
-            }
-            
-            for doc_type, doc_meta in doc_types.items():
-                doc_data = doc_result.get("raw_data", {}).get(doc_type, {})
-                if doc_data:
-                    status = "✅ Verified" if doc_data.get("is_valid", True) else "❌ Issues Found"
-                    card_class = "success-card" if doc_data.get("is_valid", True) else "error-card"
-                    
-                    with st.expander(f"{doc_meta['icon']} {doc_meta['title']} - {status}", expanded=False):
-                        st.markdown(f"""
-                        <div class="card {card_class}">
-                            <div style="display: flex; justify-content: space-between;">
-                                <div>
-                                    <p><strong>Status:</strong> {status}</p>
-                                    <p><strong>Name:</strong> {doc_data.get('name', 'N/A')}</p>
-                                </div>
-                                <div>
-                                    <p><strong>Validity:</strong> {'Valid' if doc_data.get('is_valid', True) else 'Invalid'}</p>
-                                    {f"<p><strong>Date of Birth:</strong> {doc_data.get('date_of_birth', 'N/A')}</p>" if doc_type in ["PAN", "Aadhaar"] else "<p></p>"}
-                                </div>
-                            </div>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        # Show validation details if available
-                        if "validation_notes" in doc_data:
-                            st.markdown("**Validation Notes:**")
-                            st.info(doc_data["validation_notes"])
-
-    with tab3:
-        st.subheader("Property Valuation")
-        
-        if not prop_result:
-            st.warning("No property valuation results available")
-        else:
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.markdown("""
-                <div class="card info-card">
-                    <h3 style="margin-top:0;">🏡 Property Details</h3>
-                    <div style="display: flex; justify-content: space-between;">
-                        <div>
-                            <p><strong>Location:</strong> {}</p>
-                            <p><strong>Type:</strong> {}</p>
-                        </div>
-                        <div>
-                            <p><strong>Size:</strong> {} sq.ft</p>
-                            <p><strong>Age:</strong> {} years</p>
-                        </div>
-                    </div>
-                </div>
-                """.format(
-                    f"{prop_result.get('property_data', {}).get('city', 'N/A')}, {prop_result.get('property_data', {}).get('area', 'N/A')}",
-                    prop_result.get('property_data', {}).get('property_type', 'N/A'),
-                    prop_result.get('property_data', {}).get('size_sqft', 'N/A'),
-                    prop_result.get('property_data', {}).get('age_years', 'N/A')
-                ), unsafe_allow_html=True)
-                
-                st.markdown("""
-                <div class="card" style="margin-top:20px;">
-                    <h3 style="margin-top:0;">📊 Valuation Method</h3>
-                    <p><strong>Approach:</strong> {}</p>
-                    <p><strong>Confidence:</strong> {:.0f}%</p>
-                    <p><strong>Market Comparison:</strong> {}</p>
-                </div>
-                """.format(
-                    prop_result.get('valuation_method', 'Automated Valuation Model (AVM)'),
-                    prop_result.get('confidence_score', 0) * 100,
-                    "Used comparable properties" if prop_result.get('used_comparables', False) else "No direct comparables"
-                ), unsafe_allow_html=True)
-            
-            with col2:
-                token = st.session_state.get('upload_token', '')
-                clean_token_val = clean_token(token)
-                s3_manager = S3ApplicationManager()
-                app_data = s3_manager.get_application(clean_token_val)
-                st.markdown("""
-                <div class="card success-card">
-                    <h3 style="margin-top:0;">💰 Valuation Summary</h3>
-                    <div style="text-align: center;">
-                        <h1 style="margin:10px 0; color:#4CAF50;">₹{:,}</h1>
-                        <p>Estimated Property Value</p>
-                    </div>
-                    <div style="display: flex; justify-content: space-between; margin-top:15px;">
-                        <div style="text-align: center;">
-                            <h3 style="margin:5px 0;">₹{:,}</h3>
-                            <p>Per Sq.Ft</p>
-                        </div>
-                        <div style="text-align: center;">
-                            <h3 style="margin:5px 0;">{:,}</h3>
-                            <p>Sq.Ft</p>
-                        </div>
-                        <div style="text-align: center;">
-                            <h3 style="margin:5px 0;">{:.0f}%</h3>
-                            <p>LTV Ratio</p>
-                        </div>
-                    </div>
-                </div>
-                """.format(
-                    prop_result.get('estimated_property_value', 0),
-                    prop_result.get('price_per_sqft', 0),
-                    prop_result.get('property_data', {}).get('size_sqft', 0),
-                    (app_data.get('loan_amount', 0) / app_data.get('property_value', 1)) * 100
-                ), unsafe_allow_html=True)
-                
-                # Valuation range visualization
-                min_val = int(prop_result.get('estimated_property_value', 0) * 0.95)
-                max_val = int(prop_result.get('estimated_property_value', 0) * 1.05)
-                st.markdown(f"""
-                <div style="margin-top:20px;">
-                    <h4>Valuation Range</h4>
-                    <div style="background: #f5f5f5; padding:10px; border-radius:5px;">
-                        <div style="display:flex; justify-content:space-between; margin-bottom:5px;">
-                            <span>₹{min_val:,}</span>
-                            <span>₹{max_val:,}</span>
-                        </div>
-                        <div style="height:10px; background:linear-gradient(90deg, #f44336, #ffeb3b, #4caf50); border-radius:5px; position:relative;">
-                            <div style="position:absolute; left:50%; top:-5px; width:2px; height:20px; background:#000;"></div>
-                        </div>
-                        <div style="text-align:center; margin-top:5px;">
-                            <span>₹{prop_result.get('estimated_property_value', 0):,}</span>
-                        </div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-
-    with tab4:
-        st.subheader("Credit Analysis")
-        
-        if not credit_result:
-            st.warning("No credit score results available")
-        else:
-            score = credit_result.get('credit_score', 0)
-            score_category = credit_result.get('score_category', 'Average')
-            
-            if score >= 750:
-                color = "#4CAF50"  # Green
-            elif score >= 650:
-                color = "#8BC34A"  # Light green
-            elif score >= 550:
-                color = "#FFC107"  # Yellow
-            else:
-                color = "#F44336"  # Red
-            
-            st.markdown(f"""
-            <div class="card" style="text-align:center;">
-                <h3 style="margin-top:0;">Your Credit Score</h3>
-                <div style="width:150px; height:150px; margin:0 auto; border-radius:50%; 
-                    background:conic-gradient({color} 0% {score/10}%, #e0e0e0 {score/10}% 100%);
-                    display:flex; align-items:center; justify-content:center;">
-                    <div style="background:white; width:120px; height:120px; border-radius:50%; 
-                        display:flex; align-items:center; justify-content:center;">
-                        <h1 style="margin:0; color:{color};">{score}</h1>
-                    </div>
-                </div>
-                <h3 style="color:{color};">{score_category}</h3>
-                <p>{credit_result.get('score_message', '')}</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        if score < 700:
-            with st.expander("💡 Credit Improvement Tips", expanded=True):
-                st.markdown("""
-                - **Pay bills on time:** Set up automatic payments for at least the minimum amount due
-                - **Reduce credit utilization:** Aim to use less than 30% of your available credit
-                - **Avoid new credit applications:** Each hard inquiry can slightly lower your score
-                - **Check for errors:** Review your credit report annually for inaccuracies
-                - **Keep old accounts open:** Longer credit history improves your score
-                    """)
-    
-    with tab5:
-    
-        st.subheader("Loan Recommendation")
-        
-
-
-        rec_result = result.get("results", {}).get("approval_recommendation", {})
-        st.write(rec_result.get("recommendation"))
-        if not rec_result:
-            st.warning("No recommendation available")
-        elif rec_result.get("status") == "success":
-            # Display scenario analysis if available
-            if "scenario_analysis" in rec_result:
-                with st.expander("📊 Your Financial Scenario Analysis", expanded=True):
-                    st.write(rec_result["scenario_analysis"])
-            
-            # Display loan options as compact cards
-            if "table" in rec_result and rec_result["table"]:
-                st.markdown("### Available Loan Options")
-                
-                # Create compact cards in columns
-                cols = st.columns(len(rec_result["table"]))
-                for idx, option in enumerate(rec_result["table"]):
-                    with cols[idx]:
-                        with st.container(border=True, height=350):  # Slightly taller to accommodate more info
-                            # Style based on loan type
-                            card_style = ""
-                            if "Special" in option.get("option", ""):
-                                card_style = "border-left: 5px solid #FF4B4B; background-color: #FFF5F5;"
-                            elif "Premium" in option.get("option", ""):
-                                card_style = "border-left: 5px solid #4B8DFF; background-color: #F5F9FF;"
-                            else:
-                                card_style = "border-left: 5px solid #00C853; background-color: #F5FFF7;"
-                            
-                            st.markdown(f"""<style>.card-{idx} {{{card_style}}}</style>""", 
-                                        unsafe_allow_html=True)
-                            st.markdown(f'<div class="card-{idx}">', unsafe_allow_html=True)
-                            
-                            # Header with icon
-                            if "Special" in option.get("option", ""):
-                                st.subheader(f"⚠️ {option.get('option', '')}")
-                                st.caption("Higher interest due to credit risk")
-                            else:
-                                st.subheader(f"✅ {option.get('option', '')}")
-                                st.caption("Standard eligibility terms")
-                            
-                            # Compact metrics with better formatting
-                            st.markdown(f"""
-                            **Loan Amount:**  
-                            {option.get('loan_amount', 'N/A')}  
-                            
-                            **Interest Rate:**  
-                            {option.get('interest_rate', 'N/A')}  
-                            
-                            **Tenure:**  
-                            {option.get('tenure', 'N/A')} years  
-                            
-                            **Monthly EMI:**  
-                            {option.get('monthly_emi', 'N/A')}  
-                            """)
-                            
-                            # Eligibility badge with more context
-                            if option.get("eligibility", "").lower() == "eligible":
-                                st.success("✔️ Eligible (meets all criteria)")
-                            else:
-                                st.warning(f"❗ {option.get('eligibility', 'Conditional Approval')}")
-                            
-                            st.markdown('</div>', unsafe_allow_html=True)
-            
-            # Display offer rationale if available
-            if "offer_rationale" in rec_result:
-                with st.expander("ℹ️ Why these options were recommended", expanded=True):
-                    st.write(rec_result["offer_rationale"])
-            
-            # Suggested next steps with icons
-            st.divider()
-            st.markdown("### 📝 Suggested Next Steps")
-            st.markdown("""
-            1. **Review** the loan options above  
-            2. **Compare** EMI amounts with your budget  
-            3. **Contact** a loan officer for clarification  
-            4. **Consider** adjusting your amount if needed  
-            """)
-            
-            # Additional warnings if applicable
-            if "LTV exceeded" in str(rec_result.get("recommendation", "")):
-                st.warning("ℹ️ Note: The recommended amount is lower than requested due to LTV limits")
-            elif "not eligible" in str(rec_result.get("recommendation", "")).lower():
-                st.error("🚨 Current application doesn't meet standard eligibility criteria")
-        else:
-            st.error("Recommendation generation failed")
-            st.error(rec_result.get("message", "Unknown error"))
-    
+    _results_sections(summary, fragments, app_data, doc_result, prop_result, credit_result, elig_result, rec_result)
     
     # Footer with navigation
     st.markdown("---")
@@ -1118,12 +1225,75 @@ def render_results():
             st.rerun()
     
 
+@st.fragment
+def _emi_calculator():
+    """Sidebar EMI calculator. As a fragment, moving its sliders reruns only this function."""
+    # Default values
+    default_loan_amount = 5000000  # ₹50 lakhs
+    default_interest_rate = 8.5    # 8.5%
+    default_tenure = 240           # 20 years (240 months)
+
+    # Loan amount input
+    loan_amount = st.number_input(
+        "Loan Amount (₹)",
+        min_value=100,
+        max_value=100000000,
+        value=default_loan_amount,
+        step=10000
+    )
+
+    # Interest rate slider
+    interest_rate = st.slider(
+        "Interest Rate (%)",
+        min_value=5.0,
+        max_value=20.0,
+        value=default_interest_rate,
+        step=0.1,
+        format="%.1f%%"
+    )
+
+    # Tenure slider (in months)
+    tenure = st.slider(
+        "Tenure (months)",
+        min_value=3,
+        max_value=360,
+        value=default_tenure,
+        step=1
+    )
+
+    # Calculate EMI and total interest
+    emi, total_interest, total_payment = calculate_emi(loan_amount, interest_rate, tenure)
+
+    # Display results in a single box with smaller font
+    with st.container(border=True):
+        st.markdown(_EMI_CSS, unsafe_allow_html=True)
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.markdown('<p class="small-metric">Monthly EMI</p>', unsafe_allow_html=True)
+            st.markdown(f'<p class="small-metric">₹{emi:,.0f}</p>', unsafe_allow_html=True)
+        with col2:
+            st.markdown('<p class="small-metric">Total Interest</p>', unsafe_allow_html=True)
+            st.markdown(f'<p class="small-metric">₹{total_interest:,.0f}</p>', unsafe_allow_html=True)
+        with col3:
+            st.markdown('<p class="small-metric">Total Payment</p>', unsafe_allow_html=True)
+            st.markdown(f'<p class="small-metric">₹{total_payment:,.0f}</p>', unsafe_allow_html=True)
+
+    with st.expander("Outstanding balance by month"):
+        st.line_chart(amortization_schedule(loan_amount, interest_rate, tenure)[:, 2], height=180)
+
+    # Add some explanation
+    st.caption("Note: This is an estimate. Actual terms may vary based on your eligibility.")
+
+# Form and button state dropped by "New Chat"; the flags fall back to _SESSION_DEFAULTS on the rerun
+_NEW_CHAT_RESET_KEYS = frozenset(['form_data', 'show_form_button', 'show_update_button', 'show_upload_button', 'show_existing_customer_question'])
+
 def main():
     st.title("Home Loan Assistant")
     
-    if hasattr(st.session_state, 'edit_token') and st.session_state.current_view == "edit_form":
+    if st.session_state.edit_token and st.session_state.current_view == "edit_form":
         if st.session_state.edit_token not in st.session_state.applications:
-            app_data = st.session_state.chatbot.s3_manager.get_application(st.session_state.edit_token)
+            app_data = _load_application(st.session_state.edit_token)
             if app_data:
                 st.session_state.applications[st.session_state.edit_token] = app_data
         
@@ -1134,8 +1304,7 @@ def main():
             st.error(f"Application with token {st.session_state.edit_token} not found")
             if st.button("← Back to Chat"):
                 st.session_state.current_view = "chat"
-                if hasattr(st.session_state, 'edit_token'):
-                    del st.session_state.edit_token
+                st.session_state.edit_token = None
                 st.session_state.show_form_button = False
                 st.session_state.show_update_button = False
                 st.rerun()
@@ -1150,7 +1319,7 @@ def main():
             st.rerun()
         
     elif st.session_state.current_view == "document_upload":
-        if 'upload_token' not in st.session_state or not st.session_state.upload_token:
+        if not st.session_state.upload_token:
             st.error("No application token found. Please submit an application first.")
             if st.button("← Back to Chat"):
                 st.session_state.current_view = "chat"
@@ -1160,6 +1329,8 @@ def main():
             s3_manager = st.session_state.chatbot.s3_manager
             render_document_upload(token, s3_manager)
 
+    elif st.session_state.current_view == "processing":
+        render_workflow_progress()
     elif st.session_state.current_view == "results":
         render_results()  # <-- This is the new results page
     elif st.session_state.show_cancel_button:
@@ -1175,10 +1346,8 @@ def main():
                     use_container_width=True):
             # Save current chat to history before resetting (if not empty)
             if len(st.session_state.chat_history) > 1:  # More than just initial greeting
-                timestamp = datetime.now().strftime("%m/%d %I:%M %p")
-                if 'chat_history_sessions' not in st.session_state:
-                    st.session_state.chat_history_sessions = {}
-                st.session_state.chat_history_sessions[timestamp] = st.session_state.chat_history.copy()
+                # Keyed by epoch seconds; the list is handed over as-is since chat_history is replaced below
+                st.session_state.chat_history_sessions[time.time()] = st.session_state.chat_history
             
             # Reset to fresh chat
             st.session_state.chat_history = [{
@@ -1187,9 +1356,8 @@ def main():
             }]
             
             # Clear any form states
-            for key in ['form_data', 'show_form_button', 'show_update_button','show_upload_button','show_existing_customer_question']:
-                if key in st.session_state:
-                    del st.session_state[key]
+            for key in _NEW_CHAT_RESET_KEYS & st.session_state.keys():
+                del st.session_state[key]
             
             st.rerun()
         
@@ -1198,95 +1366,42 @@ def main():
         st.header("📚 Chat History")
         
         # Display saved chats if they exist
-        if hasattr(st.session_state, 'chat_history_sessions') and st.session_state.chat_history_sessions:
-            # Sort chats by most recent first
-            sorted_sessions = sorted(
-                st.session_state.chat_history_sessions.items(),
-                key=lambda x: datetime.strptime(x[0], "%m/%d %I:%M %p"),
-                reverse=True
-            )
+        if st.session_state.chat_history_sessions:
+            # Newest-first order and labels are rebuilt only when a session is saved
+            session_labels = st.session_state.get("_history_labels")
+            if session_labels is None or len(session_labels) != len(st.session_state.chat_history_sessions):
+                # Dict keeps insertion order, so newest first is just the keys reversed
+                session_labels = {
+                    ts: f"Chat {i+1} ({datetime.fromtimestamp(ts).strftime('%m/%d %I:%M %p')})"
+                    for i, ts in enumerate(reversed(st.session_state.chat_history_sessions))
+                }
+                st.session_state._history_labels = session_labels
             
             # Display as selectable items
             selected_chat = st.selectbox(
                 "Previous conversations",
-                options=["Select a chat..."] + [f"Chat {i+1} ({date})" 
-                                            for i, (date, _) in enumerate(sorted_sessions)],
+                options=[None, *session_labels],
+                format_func=lambda ts: session_labels.get(ts, "Select a chat..."),
                 key="chat_history_selector"
             )
             
-            # Load selected chat
-            if selected_chat != "Select a chat...":
-                # Extract the timestamp from the selected option
-                selected_timestamp = selected_chat.split("(")[1].rstrip(")")
-                st.session_state.chat_history = st.session_state.chat_history_sessions[selected_timestamp].copy()
+            # Load the selected chat once per selection; the selectbox keeps its value across
+            # reruns, so without the guard every rerun would copy the history and rerun again
+            if selected_chat is not None and st.session_state.get("_loaded_chat") != selected_chat:
+                st.session_state.chat_history = list(st.session_state.chat_history_sessions[selected_chat])
+                st.session_state._loaded_chat = selected_chat
                 st.rerun()
         else:
             st.caption("No previous chats yet")
         st.markdown("---")
         st.header("💰 EMI Calculator")
 
-        # Default values
-        default_loan_amount = 5000000  # ₹50 lakhs
-        default_interest_rate = 8.5    # 8.5%
-        default_tenure = 240           # 20 years (240 months)
-
-        # Loan amount input
-        loan_amount = st.number_input(
-            "Loan Amount (₹)",
-            min_value=100,
-            max_value=100000000,
-            value=default_loan_amount,
-            step=10000
-        )
-
-        # Interest rate slider
-        interest_rate = st.slider(
-            "Interest Rate (%)",
-            min_value=5.0,
-            max_value=20.0,
-            value=default_interest_rate,
-            step=0.1,
-            format="%.1f%%"
-        )
+        _emi_calculator()
 
-        # Tenure slider (in months)
-        tenure = st.slider(
-            "Tenure (months)",
-            min_value=3,
-            max_value=360,
-            value=default_tenure,
-            step=1
-        )
-
-        # Calculate EMI and total interest
-        monthly_rate = interest_rate / 12 / 100
-        emi = (loan_amount * monthly_rate * (1 + monthly_rate)**tenure) / ((1 + monthly_rate)**tenure - 1)
-        total_payment = emi * tenure
-        total_interest = total_payment - loan_amount
-
-        # Display results in a single box with smaller font
-        with st.container(border=True):
-            st.markdown("""
-            <style>
-            .small-metric {
-                font-size: 14px !important;
-            }
-            </style>
-            """, unsafe_allow_html=True)
-        
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.markdown('<p class="small-metric">Monthly EMI</p>', unsafe_allow_html=True)
-                st.markdown(f'<p class="small-metric">₹{emi:,.0f}</p>', unsafe_allow_html=True)
-            with col2:
-                st.markdown('<p class="small-metric">Total Interest</p>', unsafe_allow_html=True)
-                st.markdown(f'<p class="small-metric">₹{total_interest:,.0f}</p>', unsafe_allow_html=True)
-            with col3:
-                st.markdown('<p class="small-metric">Total Payment</p>', unsafe_allow_html=True)
-                st.markdown(f'<p class="small-metric">₹{total_payment:,.0f}</p>', unsafe_allow_html=True)
-
-        # Add some explanation
-        st.caption("Note: This is an estimate. Actual terms may vary based on your eligibility.")
+    # Poll a background workflow run only after the rest of the page has rendered
+    if st.session_state.current_view == "processing":
+        wait([st.session_state.workflow_future], timeout=0.5)
+        st.rerun()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,7 +1,9 @@
 import os
+import asyncio
 import logging
-# import atexit
+import atexit
 import threading
+from functools import lru_cache
 from typing import List, Optional
 from pathlib import Path
 from dotenv import load_dotenv
@@ -9,13 +11,24 @@ from dotenv import load_dotenv
 import streamlit as st
 
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
-from sentence_transformers import SentenceTransformer
+from qdrant_client.models import (
+    Distance, VectorParams,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    SearchParams, QuantizationSearchParams, PayloadSelectorInclude, QueryRequest,
+    KeywordIndexParams, KeywordIndexType, OptimizersConfigDiff
+)
 from langchain.document_loaders import PyPDFLoader
+try:
+    # C-backed (MuPDF) parsing is several times faster than pypdf; needs the pymupdf package
+    from langchain_community.document_loaders import PyMuPDFLoader
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 LANGCHAIN_AVAILABLE = True
 import uuid
+import numpy as np
 
 load_dotenv()
 
@@ -23,20 +36,59 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Chunk sizes in embedding-model tokens (all-MiniLM-L6-v2 truncates input at 256)
+CHUNK_TOKENS = 256
+CHUNK_OVERLAP_TOKENS = 32
+MIN_CHUNK_TOKENS = 64
+# Merging counts content tokens only, so leave room for the [CLS]/[SEP] the model adds
+MAX_MERGED_TOKENS = CHUNK_TOKENS - 2
+
+# Opt-in ONNX Runtime embeddings via fastembed (no PyTorch needed); same MiniLM model and dimension
+USE_FASTEMBED = os.getenv("USE_FASTEMBED", "").lower() in ("1", "true", "yes")
+
+# Qdrant's default; indexing is switched off (0) while a bulk upload runs, then restored
+INDEXING_THRESHOLD = 20000
+
+# Payload keys the RAG prompt actually reads
+RAG_PAYLOAD_FIELDS = ["content", "source", "page"]
+NO_CONTEXT_RESPONSE = "I apologize, but I couldn't find relevant information about your query in our home loan documentation. Please contact our support team for more specific assistance."
+RAG_ERROR_RESPONSE = "I apologize, but I'm currently unable to process your query. Please try again later or contact our support team."
+
+_qdrant_clients = {}
+_qdrant_clients_lock = threading.Lock()
+
+def get_qdrant_client(url: Optional[str] = os.getenv("QDRANT_URL"),
+                      api_key: Optional[str] = os.getenv("QDRANT_API_KEY")) -> QdrantClient:
+    """Process-wide Qdrant client per (url, api_key). Modules survive Streamlit reruns,
+    so every session and thread shares the same gRPC channel and its HTTP/2 multiplexing"""
+    client = _qdrant_clients.get((url, api_key))
+    if client is None:
+        with _qdrant_clients_lock:
+            client = _qdrant_clients.get((url, api_key))
+            if client is None:
+                client = QdrantClient(
+                    url=url,
+                    api_key=api_key,
+                    prefer_grpc=True,  # Recommended for better performance with Qdrant Cloud
+                    timeout=30
+                )
+                _qdrant_clients[(url, api_key)] = client
+    return client
+
+@atexit.register
+def _close_qdrant_clients():
+    """Close the shared channels on interpreter shutdown"""
+    with _qdrant_clients_lock:
+        for client in _qdrant_clients.values():
+            try:
+                client.close()
+            except Exception as e:
+                logger.warning(f"Error closing Qdrant client: {str(e)}")
+        _qdrant_clients.clear()
+
 class HomeLoanRAGSystem:
-    """RAG system for home loan requirements using Qdrant vector database"""
-    
-    _instance = None
-    _lock = threading.Lock()
-    _initialized = False
-    
-    def __new__(cls, *args, **kwargs):
-        """Singleton pattern to prevent multiple instances"""
-        if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super(HomeLoanRAGSystem, cls).__new__(cls)
-        return cls._instance
+    """RAG system for home loan requirements using Qdrant vector database.
+    Use get_rag_system() for the shared, process-wide instance."""
     
     def __init__(self, 
                  qdrant_url: str = os.getenv("QDRANT_URL"),
@@ -50,33 +102,26 @@ class HomeLoanRAGSystem:
             qdrant_url: URL for Qdrant Cloud instance
             collection_name: Name of the collection in Qdrant
             api_key: API key for Qdrant Cloud authentication
-            embedding_model: Sentence transformer model for embeddings
+            embedding_model: Sentence transformer model for embeddings (run through
+                fastembed/ONNX instead of PyTorch when USE_FASTEMBED is set)
         """
-        # Only initialize once
-        if self._initialized:
-            return
-            
         self.qdrant_url = qdrant_url
         self.collection_name = collection_name
         self.api_key = api_key
         self.embedding_model_name = embedding_model
         
         # Initialize components
+        self._collection_verified = False
         self.client = None
         self.embedding_model = None
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
-        )
+        self.tokenizer = None
+        # Built on first ingest; chat/search-only processes never load the tokenizer
+        self.text_splitter = None
         
         self._initialize_components()
         
         # Register cleanup function
         # atexit.register(self._cleanup)
-        
-        # Mark as initialized
-        self._initialized = True
     
     def _initialize_components(self):
         """Initialize Qdrant client and embedding model"""
@@ -84,17 +129,21 @@ class HomeLoanRAGSystem:
             # Clean up any existing client first
             # self._cleanup_client()
             
-            # Initialize Qdrant Cloud client
-            self.client = QdrantClient(
-                url=self.qdrant_url,
-                api_key=self.api_key,
-                prefer_grpc=True  # Recommended for better performance with Qdrant Cloud
-            )
+            # Shared Qdrant Cloud client; one gRPC channel per process
+            self.client = get_qdrant_client(self.qdrant_url, self.api_key)
             logger.info(f"Connected to Qdrant Cloud at {self.qdrant_url}")
             
             # Initialize embedding model
-            self.embedding_model = SentenceTransformer(self.embedding_model_name)
+            if USE_FASTEMBED:
+                from fastembed import TextEmbedding
+                self.embedding_model = TextEmbedding(model_name=f"sentence-transformers/{self.embedding_model_name}")
+            else:
+                from sentence_transformers import SentenceTransformer
+                self.embedding_model = SentenceTransformer(self.embedding_model_name)
             logger.info(f"Loaded embedding model: {self.embedding_model_name}")
+            # Repeated queries (sample questions, retries) reuse their embedding; a fresh
+            # cache per loaded model so a model swap never serves stale vectors
+            self._encode_query = lru_cache(maxsize=512)(self._encode_query_uncached)
             
             # Create collection if it doesn't exist
             self._create_collection_if_not_exists()
@@ -112,30 +161,107 @@ class HomeLoanRAGSystem:
             collection_names = [col.name for col in collections.collections]
             
             if self.collection_name not in collection_names:
-                # Get embedding dimension
-                sample_embedding = self.embedding_model.encode(["sample text"])
-                embedding_dim = len(sample_embedding[0])
+                # Embedding dimension comes from the model config; no forward pass needed
+                embedding_dim = self._embedding_dimension()
                 
                 self.client.create_collection(
                     collection_name=self.collection_name,
                     vectors_config=VectorParams(
                         size=embedding_dim,
                         distance=Distance.COSINE
+                    ),
+                    # int8 vectors kept in RAM: ~4x smaller and cheaper distance computations
+                    quantization_config=ScalarQuantization(
+                        scalar=ScalarQuantizationConfig(
+                            type=ScalarType.INT8,
+                            quantile=0.99,
+                            always_ram=True
+                        )
+                    ),
+                    # Chunk text lives on disk so RAM only grows with the (quantized) vectors
+                    on_disk_payload=True,
+                    # One segment per core so HNSW builds run in parallel
+                    optimizers_config=OptimizersConfigDiff(
+                        default_segment_number=os.cpu_count(),
+                        indexing_threshold=INDEXING_THRESHOLD
                     )
                 )
+                # Indexed lookup for per-document filters ("only from pdf X") during HNSW traversal
+                self.client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name="source",
+                    field_schema=KeywordIndexParams(type=KeywordIndexType.KEYWORD, on_disk=True)
+                )
                 logger.info(f"Created collection: {self.collection_name}")
             else:
                 logger.info(f"Collection {self.collection_name} already exists")
+            self._collection_verified = True
                 
         except Exception as e:
             logger.error(f"Failed to create collection: {str(e)}")
     
-    def ingest_pdf(self, pdf_path: str) -> bool:
+    def _build_text_splitter(self) -> RecursiveCharacterTextSplitter:
+        """Split by embedding-model tokens so chunks fill the model window; fall back to
+        character-based splitting when the tokenizer cannot be loaded"""
+        try:
+            from transformers import AutoTokenizer
+            self.tokenizer = AutoTokenizer.from_pretrained(f"sentence-transformers/{self.embedding_model_name}")
+            return RecursiveCharacterTextSplitter.from_huggingface_tokenizer(
+                self.tokenizer,
+                chunk_size=CHUNK_TOKENS,
+                chunk_overlap=CHUNK_OVERLAP_TOKENS,
+            )
+        except Exception as e:
+            logger.warning(f"Tokenizer unavailable, splitting by characters: {str(e)}")
+            self.tokenizer = None
+            return RecursiveCharacterTextSplitter(
+                chunk_size=1000,
+                chunk_overlap=200,
+                length_function=len,
+            )
+    
+    def _merge_tiny_chunks(self, chunks: List[Document]) -> List[Document]:
+        """Fold chunks under MIN_CHUNK_TOKENS into their preceding neighbour while the
+        result, plus [CLS]/[SEP], still fits the model's 256-token window"""
+        if self.tokenizer is None or not chunks:
+            return chunks
+        
+        merged, merged_tokens = [], []
+        for chunk in chunks:
+            tokens = len(self.tokenizer.encode(chunk.page_content, add_special_tokens=False))
+            if (merged and (tokens < MIN_CHUNK_TOKENS or merged_tokens[-1] < MIN_CHUNK_TOKENS)
+                    and merged_tokens[-1] + tokens <= MAX_MERGED_TOKENS):
+                merged[-1] = Document(
+                    page_content=f"{merged[-1].page_content}\n{chunk.page_content}",
+                    metadata=merged[-1].metadata
+                )
+                merged_tokens[-1] += tokens
+            else:
+                merged.append(chunk)
+                merged_tokens.append(tokens)
+        return merged
+    
+    @staticmethod
+    def _load_pdf(pdf_path: str) -> List[Document]:
+        """Load PDF pages with PyMuPDF when installed, otherwise with pypdf"""
+        if PYMUPDF_AVAILABLE:
+            try:
+                return PyMuPDFLoader(pdf_path).load()
+            except ImportError:
+                # The loader class imports fine, but pymupdf itself is only checked on use
+                pass
+        return PyPDFLoader(pdf_path).load()
+    
+    def ingest_pdf(self, pdf_path: str, batch_size: int = 64,
+                   upload_batch_size: int = 256, upload_parallel: int = 4) -> bool:
         """
         Ingest a PDF document into the vector database
         
         Args:
             pdf_path: Path to the PDF file
+            batch_size: Number of chunks embedded per forward pass
+            upload_batch_size: Number of points sent to Qdrant per request
+            upload_parallel: Number of parallel upload workers
             
         Returns:
             bool: True if successful, False otherwise
@@ -150,92 +276,119 @@ class HomeLoanRAGSystem:
                 logger.error(f"PDF file not found: {pdf_path}")
                 return False
             
-            loader = PyPDFLoader(pdf_path)
-            documents = loader.load()
+            documents = self._load_pdf(pdf_path)
             logger.info(f"Loaded {len(documents)} pages from PDF")
             
             # Split documents into chunks
-            chunks = self.text_splitter.split_documents(documents)
+            if self.text_splitter is None:
+                self.text_splitter = self._build_text_splitter()
+            chunks = self._merge_tiny_chunks(self.text_splitter.split_documents(documents))
             logger.info(f"Split into {len(chunks)} chunks")
             
-            # Generate embeddings and store in Qdrant
-            points = []
-            for i, chunk in enumerate(chunks):
-                # Generate embedding
-                embedding = self.embedding_model.encode(chunk.page_content).tolist()
-                print(embedding)
-                # Create point
-                point = PointStruct(
-                    id=str(uuid.uuid4()),
-                    vector=embedding,
-                    payload={
-                        "content": chunk.page_content,
-                        "source": pdf_path,
-                        "page": chunk.metadata.get("page", 0),
-                        "chunk_index": i
-                    }
-                )
-                points.append(point)
+            # Embed every chunk in batched forward passes
+            embeddings = self._embed_texts([chunk.page_content for chunk in chunks], batch_size)
             
-            # Upload to Qdrant
-            self.client.upsert(
-                collection_name=self.collection_name,
-                points=points
-            )
+            # Skip HNSW indexing during the upload; restoring the threshold afterwards builds
+            # the index once over the full segments instead of incrementally
+            self._set_indexing_threshold(0)
+            try:
+                # Hand the (N, dim) float32 array straight to the uploader, batched from parallel
+                # workers; no per-vector Python list is built. wait=True so every batch is applied
+                # (cheap with indexing off) before the threshold is restored and success reported
+                self.client.upload_collection(
+                    collection_name=self.collection_name,
+                    vectors=embeddings,
+                    payload=[
+                        {
+                            "content": chunk.page_content,
+                            "source": pdf_path,
+                            "page": chunk.metadata.get("page", 0),
+                            "chunk_index": i
+                        }
+                        for i, chunk in enumerate(chunks)
+                    ],
+                    ids=[str(uuid.uuid4()) for _ in chunks],
+                    batch_size=upload_batch_size,
+                    parallel=upload_parallel,
+                    max_retries=3,
+                    wait=True
+                )
+            finally:
+                self._set_indexing_threshold(INDEXING_THRESHOLD)
+            ingested = len(chunks)
             
-            logger.info(f"Successfully ingested {len(points)} chunks from {pdf_path}")
+            logger.info(f"Successfully ingested {ingested} chunks from {pdf_path}")
             return True
             
         except Exception as e:
             logger.error(f"Failed to ingest PDF: {str(e)}")
             return False
     
-    def search_similar_documents(self, query: str, top_k: int = 5) -> List[dict]:
+    def _set_indexing_threshold(self, threshold: int):
+        try:
+            self.client.update_collection(
+                collection_name=self.collection_name,
+                optimizer_config=OptimizersConfigDiff(indexing_threshold=threshold)
+            )
+        except Exception as e:
+            logger.warning(f"Could not set indexing threshold to {threshold}: {str(e)}")
+    
+    def _embedding_dimension(self) -> int:
+        if USE_FASTEMBED:
+            return len(self._embed_texts(["dimension probe"])[0])
+        return self.embedding_model.get_sentence_embedding_dimension()
+    
+    def _embed_texts(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """(len(texts), dim) array of normalized embeddings from whichever backend is loaded"""
+        if USE_FASTEMBED:
+            return np.asarray(list(self.embedding_model.embed(texts, batch_size=batch_size)))
+        return self.embedding_model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+    
+    def _encode_query_uncached(self, query: str) -> np.ndarray:
+        """Normalized query embedding, read-only so cached vectors cannot be mutated"""
+        embedding = self._embed_texts([query])[0]
+        embedding.flags.writeable = False
+        return embedding
+    
+    def search_similar_documents(self, query: str, top_k: int = 5,
+                                 hnsw_ef: Optional[int] = 64, exact: bool = False,
+                                 payload_fields: Optional[List[str]] = None) -> List[dict]:
         """
         Search for similar documents based on query
         
         Args:
             query: Search query
             top_k: Number of top results to return
+            hnsw_ef: HNSW beam width; lower is faster, higher improves recall
+            exact: Bypass the index with a full scan (highest recall, slowest)
+            payload_fields: Payload keys to fetch per hit (default: all); [] fetches scores only
             
         Returns:
             List of similar documents with content and metadata
         """
-        if not self.client or not self.embedding_model:
-            logger.error("RAG system not properly initialized")
-            return []
-        
-        # Debug: Check collection info
-        try:
-            collection_info = self.client.get_collection(self.collection_name)
-            logger.info(f"Collection {self.collection_name} has {collection_info.vectors_count} vectors")
-        except Exception as e:
-            logger.error(f"Collection {self.collection_name} not found or error: {e}")
+        if not self._ready_for_search():
             return []
         
         try:
             # Generate query embedding
-            query_embedding = self.embedding_model.encode(query).tolist()
+            query_embedding = self._encode_query(query)
             
             # Search in Qdrant
-            search_results = self.client.search(
+            search_results = self.client.query_points(
                 collection_name=self.collection_name,
-                query_vector=query_embedding,
+                query=query_embedding,
                 limit=top_k,
-                with_payload=True
-            )
-            
-            # Format results
-            results = []
-            for result in search_results:
-                results.append({
-                    "content": result.payload["content"],
-                    "source": result.payload["source"],
-                    "page": result.payload.get("page", 0),
-                    "score": result.score,
-                    "chunk_index": result.payload.get("chunk_index", 0)
-                })
+                with_payload=self._payload_selector(payload_fields),
+                search_params=self._search_params(hnsw_ef, exact)
+            ).points
             
+            results = self._format_hits(search_results)
             logger.info(f"Found {len(results)} similar documents for query: {query[:50]}...")
             return results
             
@@ -243,6 +396,113 @@ class HomeLoanRAGSystem:
             logger.error(f"Failed to search documents: {str(e)}")
             return []
     
+    def search_many(self, queries: List[str], top_k: int = 5,
+                    hnsw_ef: Optional[int] = 64, exact: bool = False,
+                    payload_fields: Optional[List[str]] = None) -> List[List[dict]]:
+        """
+        Run several searches in one Qdrant round trip
+        
+        Args:
+            queries: Search queries, embedded together in one batch
+            top_k: Number of top results to return per query
+            hnsw_ef: HNSW beam width; lower is faster, higher improves recall
+            exact: Bypass the index with a full scan (highest recall, slowest)
+            payload_fields: Payload keys to fetch per hit (default: all); [] fetches scores only
+            
+        Returns:
+            One list of similar documents per query, in the order of queries
+        """
+        if not queries or not self._ready_for_search():
+            return [[] for _ in queries]
+        
+        try:
+            embeddings = self._embed_texts(list(queries), batch_size=8)
+            with_payload = self._payload_selector(payload_fields)
+            search_params = self._search_params(hnsw_ef, exact)
+            responses = self.client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=[
+                    QueryRequest(
+                        query=embedding.tolist(),
+                        limit=top_k,
+                        with_payload=with_payload,
+                        params=search_params
+                    )
+                    for embedding in embeddings
+                ]
+            )
+            results = [self._format_hits(response.points) for response in responses]
+            logger.info(f"Batch search for {len(queries)} queries returned {sum(map(len, results))} documents")
+            return results
+            
+        except Exception as e:
+            logger.error(f"Failed to batch search documents: {str(e)}")
+            return [[] for _ in queries]
+    
+    def _ready_for_search(self) -> bool:
+        if not self.client or not self.embedding_model:
+            logger.error("RAG system not properly initialized")
+            return False
+        
+        # The collection is checked once (at startup or on the first search), not per query
+        if not self._collection_verified:
+            try:
+                collection_info = self.client.get_collection(self.collection_name)
+                logger.info(f"Collection {self.collection_name} has {collection_info.vectors_count} vectors")
+                self._collection_verified = True
+            except Exception as e:
+                logger.error(f"Collection {self.collection_name} not found or error: {e}")
+                return False
+        return True
+    
+    @staticmethod
+    def _payload_selector(payload_fields: Optional[List[str]]):
+        if payload_fields is None:
+            return True
+        return PayloadSelectorInclude(include=payload_fields) if payload_fields else False
+    
+    @staticmethod
+    def _search_params(hnsw_ef: Optional[int], exact: bool) -> SearchParams:
+        # Oversample on the quantized vectors, then rescore with the originals to keep recall
+        return SearchParams(
+            hnsw_ef=hnsw_ef,
+            exact=exact,
+            quantization=QuantizationSearchParams(rescore=True, oversampling=2.0)
+        )
+    
+    @staticmethod
+    def _format_hits(points) -> List[dict]:
+        results = []
+        for result in points:
+            payload = result.payload or {}
+            results.append({
+                "content": payload.get("content", ""),
+                "source": payload.get("source", ""),
+                "page": payload.get("page", 0),
+                "score": result.score,
+                "chunk_index": payload.get("chunk_index", 0)
+            })
+        return results
+    
+    async def asearch_similar_documents(self, query: str, top_k: int = 5,
+                                        hnsw_ef: Optional[int] = 64, exact: bool = False,
+                                        payload_fields: Optional[List[str]] = None) -> List[dict]:
+        """
+        Async variant of search_similar_documents, run in a worker thread so
+        several queries can be awaited concurrently
+        
+        Args:
+            query: Search query
+            top_k: Number of top results to return
+            hnsw_ef: HNSW beam width; lower is faster, higher improves recall
+            exact: Bypass the index with a full scan (highest recall, slowest)
+            payload_fields: Only fetch these payload keys (None fetches all)
+            
+        Returns:
+            List of similar documents with content and metadata
+        """
+        return await asyncio.to_thread(self.search_similar_documents, query, top_k, hnsw_ef, exact, payload_fields)
+    
     def generate_rag_response(self, query: str, llm_conversation=None) -> str:
         """
         Generate response using RAG - retrieve relevant documents and generate answer
@@ -256,21 +516,12 @@ class HomeLoanRAGSystem:
         """
         try:
             # Retrieve relevant documents
-            relevant_docs = self.search_similar_documents(query, top_k=3)
+            relevant_docs = self.search_similar_documents(query, top_k=3, payload_fields=RAG_PAYLOAD_FIELDS)
             
             if not relevant_docs:
-                return "I apologize, but I couldn't find relevant information about your query in our home loan documentation. Please contact our support team for more specific assistance."
+                return NO_CONTEXT_RESPONSE
             
-            # Prepare context from retrieved documents
-            context = "\n\n".join([doc["content"] for doc in relevant_docs])
-            
-            # Create RAG prompt
-            rag_prompt = f"""Based on the following home loan documentation, please answer the user's question accurately and helpfully:
-CONTEXT:
-{context}
-USER QUESTION: {query}
-Please provide a comprehensive answer based on the documentation above. If the documentation doesn't 
-contain enough information to fully answer the question, please mention that and suggest contacting support for more details."""
+            context, rag_prompt = self._build_rag_prompt(query, relevant_docs)
 
             # Generate response using LLM if available
             if llm_conversation:
@@ -280,12 +531,65 @@ contain enough information to fully answer the question, please mention that and
                 except Exception as e:
                     logger.error(f"LLM generation failed: {str(e)}")
             
-            # Fallback response with context
-            return f"Based on our home loan documentation:\n\n{context[:1000]}{'...' if len(context) > 1000 else ''}\n\nFor more specific information about your query, please contact our support team."
+            return self._context_only_response(context)
+            
+        except Exception as e:
+            logger.error(f"Failed to generate RAG response: {str(e)}")
+            return RAG_ERROR_RESPONSE
+
+    async def agenerate_rag_response(self, query: str, llm_conversation=None,
+                                     retrieval: Optional[asyncio.Future] = None) -> str:
+        """
+        Async variant of generate_rag_response
+        
+        Args:
+            query: User query
+            llm_conversation: LangChain conversation chain for generation
+            retrieval: An already started asearch_similar_documents task for this
+                query, so the vector search can overlap with earlier LLM work
+            
+        Returns:
+            Generated response based on retrieved documents
+        """
+        try:
+            if retrieval is None:
+                retrieval = self.asearch_similar_documents(query, top_k=3, payload_fields=RAG_PAYLOAD_FIELDS)
+            relevant_docs = await retrieval
+            
+            if not relevant_docs:
+                return NO_CONTEXT_RESPONSE
+            
+            context, rag_prompt = self._build_rag_prompt(query, relevant_docs)
+
+            if llm_conversation:
+                try:
+                    response = await llm_conversation.apredict(input=rag_prompt)
+                    return response.strip()
+                except Exception as e:
+                    logger.error(f"LLM generation failed: {str(e)}")
+            
+            return self._context_only_response(context)
             
         except Exception as e:
             logger.error(f"Failed to generate RAG response: {str(e)}")
-            return "I apologize, but I'm currently unable to process your query. Please try again later or contact our support team."
+            return RAG_ERROR_RESPONSE
+
+    @staticmethod
+    def _build_rag_prompt(query: str, relevant_docs: List[dict]) -> tuple:
+        """Join the retrieved chunks into a context block and wrap it in the RAG prompt"""
+        context = "\n\n".join([doc["content"] for doc in relevant_docs])
+        rag_prompt = f"""Based on the following home loan documentation, please answer the user's question accurately and helpfully:
+CONTEXT:
+{context}
+USER QUESTION: {query}
+Please provide a comprehensive answer based on the documentation above. If the documentation doesn't 
+contain enough information to fully answer the question, please mention that and suggest contacting support for more details."""
+        return context, rag_prompt
+
+    @staticmethod
+    def _context_only_response(context: str) -> str:
+        """Fallback response with context when no LLM is available"""
+        return f"Based on our home loan documentation:\n\n{context[:1000]}{'...' if len(context) > 1000 else ''}\n\nFor more specific information about your query, please contact our support team."
     
     def is_initialized(self) -> bool:
         """Check if the RAG system is properly initialized"""
@@ -336,3 +640,26 @@ contain enough information to fully answer the question, please mention that and
             }
         except Exception as e:
             return {"error": str(e)}
+
+
+@st.cache_resource(show_spinner=False)
+def _cached_rag_system() -> HomeLoanRAGSystem:
+    return HomeLoanRAGSystem()
+
+_instance: Optional[HomeLoanRAGSystem] = None
+_instance_lock = threading.Lock()
+
+def get_rag_system() -> HomeLoanRAGSystem:
+    """Shared RAG system: one per Streamlit server via st.cache_resource, or one per
+    process elsewhere (FastAPI backend, ingestion script), so the embedding model and
+    Qdrant channel are only ever created once"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    if get_script_run_ctx() is not None:
+        return _cached_rag_system()
+    
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = HomeLoanRAGSystem()
+    return _instance
@@ -1,59 +1,95 @@
-import streamlit as st
 import os
+import io
+import copy
+import gzip
 import time
 import boto3
-from datetime import datetime
 import re
 from typing import Dict, Any, List, Optional
-import json
 import botocore
+from botocore.config import Config
+from boto3.s3.transfer import TransferConfig, create_transfer_manager
+import orjson
+import logging
+import threading
+from functools import lru_cache
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
 
-# Updated LangChain imports
-from langchain_aws import ChatBedrock
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from langchain.memory import ConversationBufferWindowMemory
-from langchain.chains import ConversationChain
-from langchain.prompts import PromptTemplate
-LANGCHAIN_AVAILABLE = True
 # S3 Configuration
 S3_BUCKET_NAME = "sarma-1"
 S3_PREFIX = "customers_data/"
 
+# Short-lived cache of application JSON keyed by clean token. Streamlit reads
+# the same application several times per render; writes invalidate the entry.
+_APPLICATION_CACHE = TTLCache(maxsize=256, ttl=30)
+_APPLICATION_CACHE_LOCK = threading.Lock()
+
+def _invalidate_application(clean_token_val: str) -> None:
+    with _APPLICATION_CACHE_LOCK:
+        _APPLICATION_CACHE.pop(clean_token_val, None)
+
+# Application token format: HL followed by 13 digits
+TOKEN_RE = re.compile(r'^HL\d{13}$')
+TOKEN_SEARCH_RE = re.compile(r'HL\d{13}')
+
+def _serialize_application(application_data: dict) -> bytes:
+    """Compact JSON, gzipped at level 1 (fast); about 5x smaller for application records"""
+    return gzip.compress(
+        orjson.dumps(application_data, default=str, option=orjson.OPT_SERIALIZE_NUMPY),
+        compresslevel=1
+    )
+
+def _deserialize_application(body: bytes) -> dict:
+    # Objects written before compression was introduced are plain JSON
+    if body[:2] == b'\x1f\x8b':
+        body = gzip.decompress(body)
+    return orjson.loads(body)
+
+def application_prefix(clean_token_val: str) -> str:
+    """Key prefix holding every object for one application.
+    The layout is customers_data/<token>/, which the property valuation agent also reads."""
+    return f"{S3_PREFIX}{clean_token_val}/"
+
+@lru_cache(maxsize=1024)
 def clean_token(token: str) -> str:
-    """Clean and standardize token format"""
+    """Clean and standardize token format (memoized; pure, so safe to cache)"""
+    if isinstance(token, str):
+        return token.strip().upper()
     if not token:
         return ""
     return str(token).strip().upper()
 
-# Initialize session state
-if 'chat_history' not in st.session_state:
-    st.session_state.chat_history = [{
-        "role": "assistant",
-        "content": "Hello! I'm your Home Loan Assistant. I can help you with information about home loans, eligibility, interest rates, and more. How can I assist you today?"
-    }]
-if 'applications' not in st.session_state:
-    st.session_state.applications = {}
-if 'current_view' not in st.session_state:
-    st.session_state.current_view = "chat"
-if 'show_form_button' not in st.session_state:
-    st.session_state.show_form_button = False
-if 'show_update_button' not in st.session_state:
-    st.session_state.show_update_button = False
-if 'show_cancel_button' not in st.session_state:
-    st.session_state.show_cancel_button = False
-if 'show_cancel_confirmation' not in st.session_state:
-    st.session_state.show_cancel_confirmation = False
+def is_valid_token(token: str) -> bool:
+    """True for a cleaned token in the HL + 13 digits format"""
+    return bool(TOKEN_RE.match(token))
 
 
 class S3ApplicationManager:
     def __init__(self, region_name="us-east-1"):
-        self.s3 = boto3.client('s3', region_name=region_name)
+        # Large enough pool that parallel document operations don't queue on connections
+        self.s3 = boto3.client(
+            's3',
+            region_name=region_name,
+            config=Config(
+                max_pool_connections=64,
+                tcp_keepalive=True,
+                retries={'max_attempts': 3, 'mode': 'adaptive'}
+            )
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=8 * 1024 * 1024,
+            multipart_chunksize=8 * 1024 * 1024,
+            max_concurrency=10,
+            use_threads=True
+        )
     
     def ensure_folder_exists(self, token: str) -> bool:
         """Ensure the token folder exists in S3"""
         try:
             clean_token_val = clean_token(token)
-            folder_key = f"{S3_PREFIX}{clean_token_val}/"
+            folder_key = application_prefix(clean_token_val)
             self.s3.put_object(
                 Bucket=S3_BUCKET_NAME,
                 Key=folder_key,
@@ -62,7 +98,7 @@ class S3ApplicationManager:
             )
             return True
         except Exception as e:
-            st.error(f"Failed to create folder in S3: {str(e)}")
+            logger.exception(f"Failed to create folder in S3: {str(e)}")
             return False
     
     def save_application(self, token: str, application_data: dict):
@@ -74,34 +110,48 @@ class S3ApplicationManager:
                 return False
                 
             # Save the application data with the new structure
-            key = f"{S3_PREFIX}{clean_token_val}/{clean_token_val}_basic_info.json"
+            key = f"{application_prefix(clean_token_val)}{clean_token_val}_basic_info.json"
             self.s3.put_object(
                 Bucket=S3_BUCKET_NAME,
                 Key=key,
-                Body=json.dumps(application_data, default=str, indent=2),
-                ContentType='application/json'
+                Body=_serialize_application(application_data),
+                ContentType='application/json',
+                ContentEncoding='gzip'
             )
+            _invalidate_application(clean_token_val)
             return True
         except Exception as e:
-            st.error(f"Failed to save application to S3: {str(e)}")
+            logger.exception(f"Failed to save application to S3: {str(e)}")
             return False
     
     def get_application(self, token: str) -> Optional[dict]:
-        try:
-            clean_token_val = clean_token(token)
-            if not clean_token_val:
+        clean_token_val = clean_token(token)
+        if not clean_token_val:
+            return None
+        
+        with _APPLICATION_CACHE_LOCK:
+            cached = _APPLICATION_CACHE.get(clean_token_val)
+        if cached is None:
+            cached = self._get_application_uncached(clean_token_val)
+            if cached is None:
                 return None
-                
-            key = f"{S3_PREFIX}{clean_token_val}/{clean_token_val}_basic_info.json"
+            with _APPLICATION_CACHE_LOCK:
+                _APPLICATION_CACHE[clean_token_val] = cached
+        # Callers keep and edit the record (session state, form data); never hand out the cached object
+        return copy.deepcopy(cached)
+    
+    def _get_application_uncached(self, clean_token_val: str) -> Optional[dict]:
+        try:
+            key = f"{application_prefix(clean_token_val)}{clean_token_val}_basic_info.json"
             response = self.s3.get_object(Bucket=S3_BUCKET_NAME, Key=key)
-            return json.loads(response['Body'].read().decode('utf-8'))
+            return _deserialize_application(response['Body'].read())
         except botocore.exceptions.ClientError as e:
             if e.response['Error']['Code'] == 'NoSuchKey':
                 return None
-            st.error(f"Error retrieving application: {str(e)}")
+            logger.exception(f"Error retrieving application: {str(e)}")
             return None
         except Exception as e:
-            st.error(f"Unexpected error: {str(e)}")
+            logger.exception(f"Unexpected error: {str(e)}")
             return None
     
     def update_application(self, token: str, updated_data: dict):
@@ -112,16 +162,18 @@ class S3ApplicationManager:
                 return False
             
             existing_data.update(updated_data)
-            existing_data['last_updated'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            # Sortable epoch seconds; format for display at read time
+            existing_data.pop('last_updated', None)
+            existing_data['last_updated_epoch'] = int(time.time())
             return self.save_application(clean_token_val, existing_data)
         except Exception as e:
-            st.error(f"Failed to update application in S3: {str(e)}")
+            logger.exception(f"Failed to update application in S3: {str(e)}")
             return False
     
     def delete_application(self, token: str) -> bool:
         try:
             clean_token_val = clean_token(token)
-            prefix = f"{S3_PREFIX}{clean_token_val}/"
+            prefix = application_prefix(clean_token_val)
             
             # List and delete all objects in the folder
             objects_to_delete = []
@@ -137,9 +189,10 @@ class S3ApplicationManager:
                     Delete={'Objects': objects_to_delete}
                 )
             
+            _invalidate_application(clean_token_val)
             return True
         except Exception as e:
-            st.error(f"Failed to delete application from S3: {str(e)}")
+            logger.exception(f"Failed to delete application from S3: {str(e)}")
             return False
     
     def list_applications(self) -> list:
@@ -152,9 +205,26 @@ class S3ApplicationManager:
                    for obj in response.get('Contents', []) 
                    if obj['Key'].endswith('.json')]
         except Exception as e:
-            st.error(f"Failed to list applications from S3: {str(e)}")
+            logger.exception(f"Failed to list applications from S3: {str(e)}")
             return []
     
+    def _ensure_documents_folder(self, clean_token_val: str) -> str:
+        documents_prefix = f"{application_prefix(clean_token_val)}documents/"
+        self.s3.put_object(
+            Bucket=S3_BUCKET_NAME,
+            Key=documents_prefix,
+            Body=b'',
+            ContentType='application/x-directory'
+        )
+        return documents_prefix
+
+    def _document_key(self, documents_prefix: str, clean_token_val: str, file_obj, doc_type: str):
+        """Validate the file extension and build the document's S3 key"""
+        file_ext = os.path.splitext(file_obj.name)[1][1:].lower()
+        if file_ext not in ['pdf', 'jpg', 'jpeg', 'png']:
+            raise ValueError(f"Unsupported file type: {file_ext}")
+        return f"{documents_prefix}{clean_token_val}_{doc_type}.{file_ext}", file_ext
+
     def upload_document(self, token: str, file_obj, doc_type: str) -> str:
         """
         Upload a document to S3 and return the full S3 path
@@ -164,47 +234,75 @@ class S3ApplicationManager:
             clean_token_val = clean_token(token)
             
             # 1. Ensure documents folder exists
-            documents_prefix = f"{S3_PREFIX}{clean_token_val}/documents/"
-            self.s3.put_object(
-                Bucket=S3_BUCKET_NAME,
-                Key=documents_prefix,
-                Body=b'',
-                ContentType='application/x-directory'
-            )
+            documents_prefix = self._ensure_documents_folder(clean_token_val)
             
             # 2. Get file extension and validate
-            file_ext = os.path.splitext(file_obj.name)[1][1:].lower()
-            if file_ext not in ['pdf', 'jpg', 'jpeg', 'png']:
-                raise ValueError(f"Unsupported file type: {file_ext}")
-            
-            # 3. Upload file
-            file_key = f"{documents_prefix}{clean_token_val}_{doc_type}.{file_ext}"
+            file_key, file_ext = self._document_key(documents_prefix, clean_token_val, file_obj, doc_type)
             
-            # For Streamlit file uploader objects
-            if hasattr(file_obj, 'read'):
-                file_bytes = file_obj.read()
-            else:
-                file_bytes = file_obj.getvalue()
-                
-            self.s3.put_object(
-                Bucket=S3_BUCKET_NAME,
-                Key=file_key,
-                Body=file_bytes,
-                ContentType=self._get_content_type(file_ext)
+            # 3. Stream the file to S3 in multipart chunks instead of reading it into memory
+            if not hasattr(file_obj, 'read'):
+                file_obj = io.BytesIO(file_obj.getvalue())
+            file_obj.seek(0)
+            self.s3.upload_fileobj(
+                file_obj,
+                S3_BUCKET_NAME,
+                file_key,
+                ExtraArgs={'ContentType': self._get_content_type(file_ext)},
+                Config=self.transfer_config
             )
             
             # Return full S3 path
             return f"s3://{S3_BUCKET_NAME}/{file_key}"
             
         except Exception as e:
-            st.error(f"Failed to upload document: {str(e)}")
+            logger.exception(f"Failed to upload document: {str(e)}")
             raise  # Re-raise to handle in calling code
 
+    def upload_documents(self, token: str, files: Dict[str, Any]):
+        """
+        Upload several documents as one batch through a shared TransferManager,
+        using multipart uploads for large files.
+        Returns ({doc_type: s3_path}, {doc_type: exception}) for the uploads
+        that succeeded and failed.
+        """
+        uploaded, failed = {}, {}
+        clean_token_val = clean_token(token)
+        try:
+            documents_prefix = self._ensure_documents_folder(clean_token_val)
+        except Exception as e:
+            logger.exception(f"Failed to upload documents: {str(e)}")
+            return uploaded, {doc_type: e for doc_type in files}
+        
+        with create_transfer_manager(self.s3, self.transfer_config) as manager:
+            futures = {}
+            for doc_type, file_obj in files.items():
+                try:
+                    file_key, file_ext = self._document_key(documents_prefix, clean_token_val, file_obj, doc_type)
+                    file_obj.seek(0)
+                    futures[doc_type] = (file_key, manager.upload(
+                        file_obj,
+                        S3_BUCKET_NAME,
+                        file_key,
+                        extra_args={'ContentType': self._get_content_type(file_ext)}
+                    ))
+                except Exception as e:
+                    failed[doc_type] = e
+            
+            for doc_type, (file_key, future) in futures.items():
+                try:
+                    future.result()
+                    uploaded[doc_type] = f"s3://{S3_BUCKET_NAME}/{file_key}"
+                except Exception as e:
+                    logger.exception(f"Failed to upload document {doc_type}: {str(e)}")
+                    failed[doc_type] = e
+        
+        return uploaded, failed
+
     def list_documents(self, token: str) -> list:
         """List all documents with full S3 paths"""
         try:
             clean_token_val = clean_token(token)
-            prefix = f"{S3_PREFIX}{clean_token_val}/documents/"
+            prefix = f"{application_prefix(clean_token_val)}documents/"
             
             response = self.s3.list_objects_v2(
                 Bucket=S3_BUCKET_NAME,
@@ -218,7 +316,7 @@ class S3ApplicationManager:
                 'last_modified': obj['LastModified']
             } for obj in response.get('Contents', []) if obj['Key'] != prefix]
         except Exception as e:
-            st.error(f"Failed to list documents: {str(e)}")
+            logger.exception(f"Failed to list documents: {str(e)}")
             return []
     
     def _get_content_type(self, file_ext: str) -> str:
@@ -235,7 +333,7 @@ class S3ApplicationManager:
         """List all documents for a given token and clean filenames by removing token prefix"""
         try:
             clean_token_val = clean_token(token)
-            prefix = f"customers_data/{clean_token_val}/documents/"
+            prefix = f"{application_prefix(clean_token_val)}documents/"
             response = self.s3.list_objects_v2(
                 Bucket="sarma-1",
                 Prefix=prefix
@@ -264,13 +362,37 @@ class S3ApplicationManager:
                 
             return documents
         except Exception as e:
-            st.error(f"Failed to list documents: {str(e)}")
+            logger.exception(f"Failed to list documents: {str(e)}")
             return []
+
     def delete_document(self, token: str, filename: str) -> None:
         try:
             clean_token_val = clean_token(token)
-            file_key = f"{S3_PREFIX}{clean_token_val}/documents/{filename}"
+            file_key = f"{application_prefix(clean_token_val)}documents/{filename}"
 
             self.s3.delete_object(Bucket=S3_BUCKET_NAME, Key=file_key)
         except Exception as e:
-            st.error(f"Failed to delete document {filename}: {str(e)}")
+            logger.exception(f"Failed to delete document {filename}: {str(e)}")
+
+    def delete_documents(self, token: str, filenames: List[str]) -> List[str]:
+        """Delete several documents of one application in a single DeleteObjects request;
+        returns the filenames that were actually deleted"""
+        if not filenames:
+            return []
+        try:
+            documents_prefix = f"{application_prefix(clean_token(token))}documents/"
+            response = self.s3.delete_objects(
+                Bucket=S3_BUCKET_NAME,
+                Delete={
+                    'Objects': [{'Key': f"{documents_prefix}{filename}"} for filename in filenames],
+                    'Quiet': True
+                }
+            )
+            # Quiet mode only reports the keys that failed
+            failed = {error['Key'][len(documents_prefix):] for error in response.get('Errors', [])}
+            for error in response.get('Errors', []):
+                logger.error(f"Failed to delete {error['Key']}: {error.get('Message')}")
+            return [filename for filename in filenames if filename not in failed]
+        except Exception as e:
+            logger.exception(f"Failed to delete documents {filenames}: {str(e)}")
+            return []
@@ -1,12 +1,15 @@
 import streamlit as st
 import os
 import time
+import threading
 import boto3
 from datetime import datetime
 import re
 from typing import Dict, Any, List
 import json
-from s3_manager import S3ApplicationManager
+from functools import lru_cache
+import numpy as np
+from s3_manager import S3ApplicationManager, clean_token, TOKEN_RE
 from chatbot import HomeLoanChatbot
 from typing import Dict, List, Optional
 try:
@@ -19,11 +22,6 @@ try:
 except ImportError:
     LANGCHAIN_AVAILABLE = False
     st.error("LangChain AWS not installed. Please run: pip install langchain-aws")
-def clean_token(token: str) -> str:
-    """Clean and standardize token format"""
-    if not token:
-        return ""
-    return str(token).strip().upper()
 # S3 Configuration
 S3_BUCKET_NAME = "sarma-1"
 S3_PREFIX = "customers_data/"
@@ -61,6 +59,30 @@ FORM_FIELDS = [
      "options": ["Excellent", "Good", "Average", "Poor"], "required": True},
 ]
 
+# Field validation patterns, compiled once at import
+FIELD_PATTERNS = {
+    'email': re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'),
+    'pan_number': re.compile(r'^[A-Z]{5}[0-9]{4}[A-Z]{1}$'),
+}
+
+# O(1) field lookup by name, and (field, required_if) pairs for the submit-time validation loop
+FORM_FIELDS_BY_NAME = {field['name']: field for field in FORM_FIELDS}
+FORM_FIELD_VALIDATIONS = [(field, field.get('required_if')) for field in FORM_FIELDS]
+# Visibility rule per conditional field; every other field is always rendered
+_CONDITIONAL_FIELDS = {field['name']: field['required_if'] for field in FORM_FIELDS if 'required_if' in field}
+
+# Field names per column for the two-column form sections, so each section is one st.columns call
+FORM_COLUMN_LAYOUTS = {
+    'personal': (
+        ('full_name', 'gender', 'phone', 'pan_number', 'existing_loans'),
+        ('date_of_birth', 'email', 'aadhar_number', 'marital_status', 'purpose_of_loan'),
+    ),
+    'property': (
+        ('property_location_city', 'property_location_area', 'property_type', 'property_size_sqft'),
+        ('property_age_years', 'property_condition', 'property_value', 'loan_amount'),
+    ),
+}
+
 # Sample questions for quick access
 SAMPLE_QUESTIONS = [
     "What is the current home loan interest rate?",
@@ -134,46 +156,84 @@ def handle_cancellation_flow():
             st.session_state.current_view = "chat"
             st.rerun()
 
+def _is_n_digits(value: Any, n: int) -> bool:
+    # Plain string checks beat a regex for fixed-length numbers (and, unlike \d{n}$, reject a trailing newline)
+    s = str(value)
+    return len(s) == n and s.isascii() and s.isdigit()
+
+# Per-field checks, each returning an error message or None; looked up by field name
+_FIELD_VALIDATORS = {
+    'email': lambda v: None if FIELD_PATTERNS['email'].match(v) else "Please enter a valid email address",
+    'phone': lambda v: None if _is_n_digits(v, 10) else "Phone number must be exactly 10 digits",
+    'aadhar_number': lambda v: None if _is_n_digits(v, 12) else "Aadhar number must be exactly 12 digits",
+    'pan_number': lambda v: None if FIELD_PATTERNS['pan_number'].match(v.upper()) else "PAN number format should be like ABCDE1234F",
+    'property_size_sqft': lambda v: None if v > 0 else "Property size must be greater than 0",
+    'property_age_years': lambda v: None if v >= 0 else "Property age must be non-negative",
+}
+
 def validate_field(field: Dict, value: Any) -> tuple[bool, str]:
     if field.get('required') and not value:
         return False, f"{field['label']} is required"
     
-    if field['name'] == 'email' and value:
-        if not re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', value):
-            return False, "Please enter a valid email address"
-    
-    if field['name'] == 'phone' and value:
-        if not re.match(r'^\d{10}$', str(value)):
-            return False, "Phone number must be exactly 10 digits"
-    
-    if field['name'] == 'aadhar_number' and value:
-        if not re.match(r'^\d{12}$', str(value)):
-            return False, "Aadhar number must be exactly 12 digits"
-    
-    if field['name'] == 'pan_number' and value:
-        if not re.match(r'^[A-Z]{5}[0-9]{4}[A-Z]{1}$', value.upper()):
-            return False, "PAN number format should be like ABCDE1234F"
-    if field['name'] == 'property_size_sqft' and value:
-        if value <= 0:
-            return False, "Property size must be greater than 0"
-    if field['name'] == 'property_age_years' and value:
-        if value < 0:
-            return False, "Property age must be non-negative"
+    validator = _FIELD_VALIDATORS.get(field['name'])
+    if validator and value:
+        error_msg = validator(value)
+        if error_msg:
+            return False, error_msg
     
     return True, ""
 
+def validate_form(form_data: Dict, collect_all: bool = True) -> List[str]:
+    """Validate every applicable field; with collect_all=False stop at the first error"""
+    errors = []
+    for field, required_if in FORM_FIELD_VALIDATIONS:
+        if required_if and form_data.get(required_if['field']) != required_if['value']:
+            continue
+        is_valid, error_msg = validate_field(field, form_data.get(field['name']))
+        if not is_valid:
+            errors.append(error_msg)
+            if not collect_all:
+                break
+    return errors
+
+@lru_cache(maxsize=128)
+def calculate_emi(loan_amount: float, interest_rate: float, tenure: int) -> tuple:
+    """(monthly EMI, total interest, total payment); memoized since sidebar inputs rarely change between reruns"""
+    monthly_rate = interest_rate / 12 / 100
+    factor = (1 + monthly_rate) ** tenure
+    emi = loan_amount * monthly_rate * factor / (factor - 1)
+    total_payment = emi * tenure
+    return emi, total_payment - loan_amount, total_payment
+
+@lru_cache(maxsize=32)
+def amortization_schedule(loan_amount: float, interest_rate: float, tenure: int) -> np.ndarray:
+    """(tenure, 3) read-only array of [principal, interest, closing balance] per month, from the closed-form balance"""
+    monthly_rate = interest_rate / 12 / 100
+    emi = calculate_emi(loan_amount, interest_rate, tenure)[0]
+    growth = (1 + monthly_rate) ** np.arange(tenure + 1)
+    balance = loan_amount * growth - emi * (growth - 1) / monthly_rate
+    interest = balance[:-1] * monthly_rate
+    schedule = np.column_stack((emi - interest, interest, np.maximum(balance[1:], 0.0)))
+    schedule.flags.writeable = False
+    return schedule
+
+_last_token_ms = 0
+_token_lock = threading.Lock()
+
 def generate_token() -> str:
-    timestamp = int(time.time() * 1000)
-    return f"HL{timestamp}"
+    """HL + 13-digit epoch milliseconds (integer clock, no float rounding); bumped past the
+    last issued value so concurrent submits in the same millisecond never share a token"""
+    global _last_token_ms
+    with _token_lock:
+        _last_token_ms = max(time.time_ns() // 1_000_000, _last_token_ms + 1)
+        return f"HL{_last_token_ms}"
 
 def render_form_field(field: Dict, value: Any = None, employment_status: str = None):
     key = f"form_{field['name']}"
     
-    if 'required_if' in field:
-        required_field = field['required_if']['field']
-        required_value = field['required_if']['value']
-        if required_field == 'employment_status' and employment_status != required_value:
-            return None
+    rule = _CONDITIONAL_FIELDS.get(field['name'])
+    if rule and rule['field'] == 'employment_status' and employment_status != rule['value']:
+        return None
     
     if field['type'] == 'text':
         return st.text_input(field['label'], value=value or "", key=key)